@@ -0,0 +1,30 @@
+from http import HTTPStatus
+
+from db.redis import get_redis
+from fastapi import APIRouter, Depends, HTTPException
+from models.base import OrjsonBaseModel
+from redis.asyncio import Redis
+from services.hotkeys import get_hot_key_tracker
+
+router = APIRouter()
+
+
+class HotKey(OrjsonBaseModel):
+    key: str
+    score: float
+
+
+@router.get(
+    "/hot-keys",
+    response_model=list[HotKey],
+    summary="Горячие ключи кэша",
+    description="Самые запрашиваемые ключи кэша по всем воркерам",
+)
+async def hot_keys(redis: Redis = Depends(get_redis)) -> list[HotKey]:
+    tracker = get_hot_key_tracker(redis)
+    if tracker is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="hot key tracking is disabled"
+        )
+
+    return [HotKey(key=key, score=score) for key, score in await tracker.global_top()]
@@ -4,7 +4,7 @@ from uuid import UUID
 
 from core import config
 from core.logger import logger
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models.base import OrjsonBaseModel
 from pydantic import BaseModel
 from services.film import FilmService, get_film_service
@@ -43,9 +43,13 @@ class FilmDetailResponse(BaseModel):
     "/",
     response_model=list[FilmResponse],
     summary="Список фильмов",
-    description="Получить список фильмов",
+    description=(
+        "Получить список фильмов. С параметром cursor (пустым для первой "
+        "страницы) страницы листаются курсором из заголовка X-Next-Cursor"
+    ),
 )
 async def films_list(
+    response: Response,
     sort: Annotated[
         list[Literal["imdb_rating", "-imdb_rating"]],
         Query(description="Sort by imdb_rating"),
@@ -54,8 +58,21 @@ async def films_list(
     film_service: FilmService = Depends(get_film_service),
     page_size: Annotated[int, Query(description="Фильмов на страницу", ge=1)] = 50,
     page_number: Annotated[int, Query(description="Номер страницы", ge=1)] = 1,
+    cursor: Annotated[
+        str | None, Query(description="Курсор страницы вместо номера")
+    ] = None,
 ) -> List[FilmResponse]:
-    films = await film_service.get_list(sort, genre, page_size, page_number)
+    if cursor is None:
+        films = await film_service.get_list(sort, genre, page_size, page_number)
+    else:
+        try:
+            films, next_cursor = await film_service.get_list_page(
+                sort, genre, page_size, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     return [
         FilmResponse(uuid=film.id, title=film.title, imdb_rating=film.imdb_rating)
         for film in films
@@ -2,7 +2,7 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models.base import OrjsonBaseModel
 from services.genre import GenreService, get_genre_service
 
@@ -18,14 +18,29 @@ class Genre(OrjsonBaseModel):
     "",
     response_model=list[Genre],
     summary="Список жанров",
-    description="Получить список жанров",
+    description=(
+        "Получить список жанров. С параметром cursor (пустым для первой "
+        "страницы) страницы листаются курсором из заголовка X-Next-Cursor"
+    ),
 )
 async def genre_list(
+    response: Response,
     genre_service: GenreService = Depends(get_genre_service),
     page_size: Annotated[int, Query(description="Жанров на страницу", ge=1)] = 50,
     page_number: Annotated[int, Query(description="Номер страницы", ge=1)] = 1,
+    cursor: Annotated[
+        str | None, Query(description="Курсор страницы вместо номера")
+    ] = None,
 ):
-    genres = await genre_service.get_list(page_number, page_size)
+    if cursor is None:
+        genres = await genre_service.get_list(page_number, page_size)
+    else:
+        try:
+            genres, next_cursor = await genre_service.get_list_page(page_size, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     return [Genre(uuid=genre.id, name=genre.name) for genre in genres]
 
 
@@ -2,7 +2,7 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from models.base import OrjsonBaseModel
 from services.person import PersonService, get_person_service
 
@@ -30,15 +30,33 @@ class Person(OrjsonBaseModel):
     "/search",
     response_model=list[Person],
     summary="Поиск по персонажам",
-    description="Получить список персонажей, отвечающих условиям запроса",
+    description=(
+        "Получить список персонажей, отвечающих условиям запроса. С параметром "
+        "cursor (пустым для первой страницы) страницы листаются курсором из "
+        "заголовка X-Next-Cursor"
+    ),
 )
 async def person_search_list(
+    response: Response,
     person_service: PersonService = Depends(get_person_service),
     page_size: Annotated[int, Query(description="Персонажей на страницу", ge=1)] = 50,
     page_number: Annotated[int, Query(description="Номер страницы", ge=1)] = 1,
     query: Annotated[str, Query(description="Запрос")] = "Query",
+    cursor: Annotated[
+        str | None, Query(description="Курсор страницы вместо номера")
+    ] = None,
 ):
-    persons = await person_service.get_search_list(query, page_number, page_size)
+    if cursor is None:
+        persons = await person_service.get_search_list(query, page_number, page_size)
+    else:
+        try:
+            persons, next_cursor = await person_service.get_search_list_page(
+                query, page_size, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     persons_response = []
     if not persons:
         return []
@@ -0,0 +1,127 @@
+"""Maintenance commands for the movies API.
+
+Usage:
+    python cli.py train-zstd-dictionary --pattern 'v1:film:*' --output film.zstd_dict
+    python cli.py invalidate-namespace films_list persons_list
+    python cli.py warmup
+"""
+
+import argparse
+import asyncio
+import logging
+
+from core.config import settings
+from elasticsearch import AsyncElasticsearch
+from redis.asyncio import Redis
+from services.cache import (
+    CACHE_HEADER,
+    CACHE_KEY_PREFIX,
+    COMPRESSION_FLAGS,
+    RedisCacheEngine,
+    get_cache_compressors,
+    train_zstd_dictionary,
+)
+from services.film import get_film_service
+from services.genre import get_genre_service
+from services.warmup import warm_up_cache
+
+logger = logging.getLogger(__name__)
+
+
+async def collect_cache_samples(redis: Redis, pattern: str, limit: int) -> list[bytes]:
+    """Collect uncompressed payloads of cached values matching the pattern."""
+    decompressors = {
+        compressor.flag: compressor for compressor in get_cache_compressors()
+    }
+    samples = []
+    async for key in redis.scan_iter(match=pattern, count=1000):
+        value = await redis.get(key)
+        if not value or len(value) <= CACHE_HEADER.size:
+            continue
+
+        flags = CACHE_HEADER.unpack_from(value)[2]
+        payload = value[CACHE_HEADER.size :]
+        compression = flags & COMPRESSION_FLAGS
+        if compression:
+            try:
+                payload = decompressors[compression].decompress(payload)
+            except Exception as e:
+                logger.debug(f"Skipping {key}: {e}")
+                continue
+
+        samples.append(payload)
+        if len(samples) >= limit:
+            break
+
+    return samples
+
+
+async def train_zstd_dictionary_command(args: argparse.Namespace) -> None:
+    redis = Redis.from_url(settings.redis_dsn)
+    try:
+        samples = await collect_cache_samples(redis, args.pattern, args.samples)
+    finally:
+        await redis.close()
+
+    logger.info(f"Training zstd dictionary on {len(samples)} samples")
+    dictionary = train_zstd_dictionary(samples, args.size)
+
+    with open(args.output, "wb") as dictionary_file:
+        dictionary_file.write(dictionary)
+    logger.info(f"Saved {len(dictionary)} bytes dictionary to {args.output}")
+
+
+async def invalidate_namespace_command(args: argparse.Namespace) -> None:
+    redis = Redis.from_url(settings.redis_dsn)
+    try:
+        cache_engine = RedisCacheEngine(redis)
+        for namespace in args.namespaces:
+            await cache_engine.invalidate_namespace(namespace)
+    finally:
+        await redis.close()
+
+
+async def warmup_command(args: argparse.Namespace) -> None:
+    redis = Redis.from_url(settings.redis_dsn)
+    elastic = AsyncElasticsearch(hosts=[settings.elastic_dsn])
+    try:
+        await warm_up_cache(
+            get_film_service(redis, elastic), get_genre_service(redis, elastic)
+        )
+    finally:
+        await redis.close()
+        await elastic.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=settings.project_name)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser(
+        "train-zstd-dictionary",
+        help="Train a zstd dictionary from values already in the cache",
+    )
+    train.add_argument("--pattern", default=f"{CACHE_KEY_PREFIX}:film:*")
+    train.add_argument("--samples", type=int, default=1000)
+    train.add_argument("--size", type=int, default=16 * 1024)
+    train.add_argument("--output", required=True)
+    train.set_defaults(handler=train_zstd_dictionary_command)
+
+    invalidate = commands.add_parser(
+        "invalidate-namespace",
+        help="Invalidate all cached keys of the namespaces, e.g. after a reindex",
+    )
+    invalidate.add_argument("namespaces", nargs="+")
+    invalidate.set_defaults(handler=invalidate_namespace_command)
+
+    warmup = commands.add_parser(
+        "warmup", help="Prefetch the hottest pages and films into the cache"
+    )
+    warmup.set_defaults(handler=warmup_command)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
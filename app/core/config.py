@@ -23,14 +23,122 @@ class EtlSettings(BaseSettings):
 
     redis_host: str
     redis_port: int
+    # Send commands issued in one loop iteration (or window) as one pipeline.
+    redis_auto_pipeline: bool = False
+    redis_auto_pipeline_window_ms: float = 0
 
+    # Soft/hard TTL pairs: past the soft TTL a cached value is still served
+    # but refreshed in the background, past the hard TTL it is gone.
+    film_cache_soft_expire_in_seconds: int = 60
     film_cache_expire_in_seconds: int
+    genre_cache_soft_expire_in_seconds: int = 60
     genre_cache_expire_in_seconds: int
+    person_cache_soft_expire_in_seconds: int = 60
     person_cache_expire_in_seconds: int
+    # How long a missing ID is remembered, 0 disables negative caching.
+    negative_cache_expire_in_seconds: int = 30
+
+    # orjson or msgpack (needs the msgpack package)
+    cache_codec: str = "orjson"
+    # zstd, lz4 (needs the lz4 package) or none
+    cache_compression: str = "zstd"
+    cache_compression_threshold: int = 1024
+    cache_zstd_level: int = 3
+    cache_zstd_dictionary_path: str | None = None
+
+    cache_lease_expire_in_milliseconds: int = 5000
+    cache_lease_wait_in_seconds: float = 3.0
+    # Relative spread applied to TTLs, 0.1 means +-10%.
+    cache_ttl_jitter: float = 0.1
+    # XFetch aggressiveness, 0 disables early refresh.
+    cache_xfetch_beta: float = 1.0
+    # Store list pages as ID arrays over shared per-entity entries.
+    cache_normalized: bool = False
+    # Namespaces whose keys embed a generation counter kept in Redis, so the
+    # whole namespace can be invalidated by bumping it.
+    cache_generation_namespaces: list[str] = [
+        "films_list",
+        "genres_list",
+        "persons_list",
+    ]
+    cache_generation_refresh_in_seconds: float = 1.0
+
+    # Invalidate (and rebuild) cached entities from ETL change events.
+    cache_events_enabled: bool = False
+    cache_events_stream: str = "cache:events"
+    cache_events_group: str = "movies_api"
+    cache_events_batch_size: int = 100
+    cache_events_block_ms: int = 5000
+    cache_events_claim_idle_ms: int = 60000
+    cache_events_rebuild: bool = True
+
+    local_cache_enabled: bool = False
+    local_cache_expire_in_seconds: int = 5
+    # Evict local entries on Redis client tracking invalidations of every
+    # local namespace: off or bcast.
+    local_cache_tracking: str = "off"
+    local_cache_sizes: dict[str, int] = {
+        "film": 1000,
+        "genre": 100,
+        "person": 1000,
+        "films_list": 100,
+        "genres_list": 10,
+        "persons_list": 100,
+        "film_item": 1000,
+        "genre_item": 100,
+        "person_item": 1000,
+    }
+    # Share of every local namespace budget kept as the LRU window new keys
+    # enter before TinyLFU admission to the main area.
+    local_cache_window_share: float = 0.01
 
     movies_index: str
     genres_index: str
     persons_index: str
+    # Collect get-by-ID lookups of concurrent requests for this long and
+    # fetch them with one _mget per index, 0 disables batching.
+    search_batch_window_in_milliseconds: float = 0
+    search_batch_size: int = 1000
+    # Read cursor pages from a point in time, so a client paging through a
+    # list sees one consistent snapshot. Elasticsearch time units.
+    search_cursor_pit_enabled: bool = False
+    search_cursor_keep_alive: str = "1m"
+
+    # Sample key accesses to find hot keys, which are pinned in the local
+    # cache and refreshed in the background.
+    hot_keys_enabled: bool = False
+    hot_keys_sample_rate: float = 0.1
+    hot_keys_top_k: int = 100
+    # Accesses over the last two intervals, from all workers.
+    hot_keys_threshold: int = 50
+    hot_keys_interval_in_seconds: int = 10
+    # Mount the unauthenticated /api/v1/admin endpoints (hot keys), only for
+    # deployments where they are not reachable from the outside.
+    admin_api_enabled: bool = False
+    # Scale TTLs with the access rate of hot-key tracking: keys read more
+    # often than the reference rate (per second) live longer, up to the max,
+    # and get their TTL extended on reads shortly before expiring. Requires
+    # hot_keys_enabled.
+    cache_adaptive_ttl_enabled: bool = False
+    cache_min_expire_in_seconds: int = 60
+    cache_max_expire_in_seconds: int = 3600
+    cache_adaptive_ttl_reference_rate: float = 0.1
+    cache_ttl_extend_fraction: float = 0.1
+
+    # Prefetch the first film pages of every sort, all genres and the
+    # top-rated films before the worker starts serving.
+    warmup_enabled: bool = False
+    warmup_film_pages: int = 5
+    warmup_page_size: int = 50
+    warmup_film_details: int = 100
+    warmup_concurrency: int = 10
+    warmup_timeout_in_seconds: float = 60
+
+    # Answer lookups of unknown IDs from per-index Bloom filters. New IDs
+    # come from the change events, so this requires cache_events_enabled.
+    id_filter_enabled: bool = False
+    id_filter_error_rate: float = 0.001
+    id_filter_refresh_in_seconds: int = 3600
 
     @property
     def elastic_dsn(self):
@@ -1,6 +1,195 @@
+import asyncio
+import logging
+from typing import Callable
+
 from redis.asyncio import Redis
+from redis.asyncio.connection import Connection
+
+logger = logging.getLogger(__name__)
 
 redis: Redis | None = None
+tracking: "RedisTrackingListener | None" = None
+
+
+class AutoPipelineRedis(Redis):
+    """Redis client that sends concurrent commands as one pipeline.
+
+    Commands issued within one event loop iteration (or within ``window``
+    seconds of the first of them) are written to Redis together and the
+    replies are split back to each caller, so callers need no changes.
+    """
+
+    # Blocking and connection-scoped commands cannot share a pipeline.
+    unpipelined_commands = {
+        "BLPOP",
+        "BRPOP",
+        "BLMOVE",
+        "BZPOPMIN",
+        "BZPOPMAX",
+        "CLIENT",
+        "WAIT",
+        "XREAD",
+        "XREADGROUP",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window = 0.0
+        self._queue: list[tuple[tuple, dict, asyncio.Future]] = []
+        self._flush_scheduled = False
+        self._pipelines: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_url(cls, url: str, window: float = 0.0, **kwargs) -> "AutoPipelineRedis":
+        client = super().from_url(url, **kwargs)
+        client.window = window
+        return client
+
+    async def execute_command(self, *args, **options):
+        if str(args[0]).upper() in self.unpipelined_commands:
+            return await super().execute_command(*args, **options)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((args, options, future))
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            if self.window:
+                loop.call_later(self.window, self._flush)
+            else:
+                loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        queue, self._queue = self._queue, []
+        self._flush_scheduled = False
+
+        task = asyncio.create_task(self._execute(queue))
+        self._pipelines.add(task)
+        task.add_done_callback(self._pipelines.discard)
+
+    async def _execute(self, queue: list[tuple[tuple, dict, asyncio.Future]]) -> None:
+        if len(queue) == 1:
+            args, options, future = queue[0]
+            try:
+                result = await super().execute_command(*args, **options)
+            except Exception as e:
+                result = e
+            self._resolve(future, result)
+            return
+
+        pipe = self.pipeline(transaction=False)
+        for args, options, _ in queue:
+            pipe.execute_command(*args, **options)
+
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Auto pipeline of {len(queue)} commands failed: {e}")
+            results = [e] * len(queue)
+
+        for (_, _, future), result in zip(queue, results):
+            self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result) -> None:
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+class RedisTrackingListener:
+    """Receives client-side caching invalidations in broadcast mode.
+
+    A dedicated RESP3 connection tracks every key under ``prefixes`` with
+    ``CLIENT TRACKING ON BCAST``, so Redis pushes the keys changed by any
+    client, this worker included, to ``on_invalidate``, or ``None`` when the
+    database is flushed or invalidations may have been missed.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        on_invalidate: Callable[[list[str] | None], None],
+        prefixes: list[str] | None = None,
+    ):
+        self.redis = redis
+        self.on_invalidate = on_invalidate
+        self.prefixes = prefixes or []
+        self._connection: Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self._connect()
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._connection is not None:
+            await self._connection.disconnect()
+
+    async def _connect(self) -> None:
+        if self._connection is not None:
+            await self._connection.disconnect()
+            self._connection = None
+
+        connection = await self._new_connection()
+        args = ["CLIENT", "TRACKING", "ON", "BCAST"]
+        for prefix in self.prefixes:
+            args.extend(["PREFIX", prefix])
+        try:
+            await connection.send_command(*args)
+            await connection.read_response()
+        except BaseException:
+            await connection.disconnect()
+            raise
+        self._connection = connection
+        logger.info(f"Redis client tracking enabled for {self.prefixes}")
+
+    async def _new_connection(self) -> Connection:
+        pool = self.redis.connection_pool
+        connection = pool.connection_class(**{**pool.connection_kwargs, "protocol": 3})
+        await connection.connect()
+        return connection
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                response = await self._connection.read_response(push_request=True)
+                if isinstance(response, list) and response[0] in (
+                    b"invalidate",
+                    "invalidate",
+                ):
+                    keys = response[1]
+                    self.on_invalidate(
+                        None
+                        if keys is None
+                        else [
+                            key.decode() if isinstance(key, bytes) else key
+                            for key in keys
+                        ]
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Changes made while disconnected are lost, drop everything.
+                logger.error(f"Redis client tracking connection failed: {e}")
+                self.on_invalidate(None)
+                await asyncio.sleep(1)
+                try:
+                    await self._connect()
+                except Exception as e:
+                    logger.error(f"Unable to restore Redis client tracking: {e}")
 
 
 async def get_redis() -> Redis:
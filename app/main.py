@@ -1,10 +1,16 @@
-from api.v1 import films, genres, persons
+from api.v1 import admin, films, genres, persons
 from core.config import settings
 from db import elastic, redis
 from elasticsearch import AsyncElasticsearch
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
+from services import bloom, events
+from services.cache import CACHE_KEY_PREFIX, get_adaptive_ttl, get_cache_engine
+from services.film import get_film_service
+from services.genre import get_genre_service
+from services.hotkeys import get_hot_key_tracker
+from services.warmup import warm_up_cache
 
 app = FastAPI(
     title=settings.project_name,
@@ -16,12 +22,74 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup():
-    redis.redis = Redis.from_url(settings.redis_dsn)
+    if settings.redis_auto_pipeline:
+        redis.redis = redis.AutoPipelineRedis.from_url(
+            settings.redis_dsn, window=settings.redis_auto_pipeline_window_ms / 1000
+        )
+    else:
+        redis.redis = Redis.from_url(settings.redis_dsn)
     elastic.es = AsyncElasticsearch(hosts=[settings.elastic_dsn])
 
+    if settings.local_cache_tracking not in ("off", "bcast"):
+        raise RuntimeError("LOCAL_CACHE_TRACKING must be off or bcast")
+    if settings.local_cache_enabled and settings.local_cache_tracking == "bcast":
+        redis.tracking = redis.RedisTrackingListener(
+            redis.redis,
+            get_cache_engine(redis.redis).invalidate_local,
+            prefixes=[
+                f"{CACHE_KEY_PREFIX}:{namespace}:"
+                for namespace, size in settings.local_cache_sizes.items()
+                if size > 0
+            ],
+        )
+        await redis.tracking.start()
+
+    if settings.id_filter_enabled:
+        # New IDs reach the filters only through the change events, without
+        # them the API would answer 404 for new documents until a rebuild.
+        if not settings.cache_events_enabled:
+            raise RuntimeError("ID_FILTER_ENABLED requires CACHE_EVENTS_ENABLED")
+        # Built in the background, lookups pass through until it is ready.
+        bloom.id_filters = bloom.IdFilters(
+            elastic.es,
+            redis.redis,
+            events.ENTITY_INDICES,
+            stream=settings.cache_events_stream,
+            error_rate=settings.id_filter_error_rate,
+            refresh=settings.id_filter_refresh_in_seconds,
+            block=settings.cache_events_block_ms,
+        )
+        bloom.id_filters.start()
+
+    hot_keys = get_hot_key_tracker(redis.redis)
+    if hot_keys is not None:
+        hot_keys.start()
+    # Rejects adaptive TTLs without hot keys before serving any request.
+    get_adaptive_ttl()
+
+    if settings.cache_events_enabled:
+        events.consumer = events.get_cache_event_consumer(redis.redis, elastic.es)
+        events.consumer.start()
+
+    # Startup, and so serving requests, waits until the cache is warm.
+    if settings.warmup_enabled:
+        await warm_up_cache(
+            get_film_service(redis.redis, elastic.es),
+            get_genre_service(redis.redis, elastic.es),
+        )
+
 
 @app.on_event("shutdown")
 async def shutdown():
+    if events.consumer is not None:
+        await events.consumer.stop()
+    if bloom.id_filters is not None:
+        await bloom.id_filters.stop()
+    hot_keys = get_hot_key_tracker(redis.redis)
+    if hot_keys is not None:
+        await hot_keys.stop()
+    if redis.tracking is not None:
+        await redis.tracking.stop()
     await redis.redis.close()
     await elastic.es.close()
 
@@ -29,3 +97,5 @@ async def shutdown():
 app.include_router(films.router, prefix="/api/v1/films", tags=["films"])
 app.include_router(genres.router, prefix="/api/v1/genres", tags=["genres"])
 app.include_router(persons.router, prefix="/api/v1/persons", tags=["persons"])
+if settings.admin_api_enabled:
+    app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
@@ -0,0 +1,176 @@
+"""Bloom filters of the IDs that exist in the search indices.
+
+A lookup of an ID the filter has never seen is answered as missing without
+touching the cache or the search engine, which keeps random-UUID
+enumeration cheap. False positives only cost a regular lookup.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from uuid import UUID
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_scan
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+id_filters: "IdFilters | None" = None
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: k positions out of two 64-bit hashes.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+def _decode(value: object) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class IdFilters:
+    """Per-index Bloom filters rebuilt periodically from the indices.
+
+    Until the first build of an index finishes its IDs are treated as
+    possibly existing. IDs created between rebuilds are added from the
+    change event stream, which every worker reads on its own (without the
+    consumer group), so each worker's filters see every new ID. A rebuild
+    also drops deleted IDs.
+    """
+
+    def __init__(
+        self,
+        elastic: AsyncElasticsearch,
+        redis: Redis,
+        indices: dict[str, str],
+        stream: str,
+        error_rate: float = 0.001,
+        refresh: int = 3600,
+        block: int = 5000,
+    ):
+        self.elastic = elastic
+        self.redis = redis
+        # Entity name of the change events -> index.
+        self.indices = indices
+        self.stream = stream
+        self.error_rate = error_rate
+        self.refresh = refresh
+        self.block = block
+        self._filters: dict[str, BloomFilter] = {}
+        # IDs added since the current build of the index began, collected
+        # from the start so none is lost before the first build.
+        self._pending: dict[str, set[str]] = {
+            index: set() for index in indices.values()
+        }
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._follow_events()),
+            asyncio.create_task(self._run()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def might_exist(self, index: str, id: str) -> bool:
+        bloom_filter = self._filters.get(index)
+        return bloom_filter is None or id in bloom_filter
+
+    def add(self, index: str, id: str) -> None:
+        if index in self._pending:
+            self._pending[index].add(id)
+        if index in self._filters:
+            self._filters[index].add(id)
+
+    async def _follow_events(self) -> None:
+        last_id = "$"
+        while True:
+            try:
+                response = await self.redis.xread(
+                    {self.stream: last_id}, block=self.block
+                )
+                for entry_id, fields in response[0][1] if response else []:
+                    last_id = _decode(entry_id)
+                    self._add_created(
+                        {_decode(key): _decode(value) for key, value in fields.items()}
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading change events for ID filters: {e}")
+                await asyncio.sleep(1)
+
+    def _add_created(self, fields: dict[str, str]) -> None:
+        index = self.indices.get(fields.get("entity", ""))
+        if index is None or fields.get("op", "upsert") == "delete":
+            return
+        try:
+            self.add(index, str(UUID(fields.get("id", ""))))
+        except ValueError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            for index in self.indices.values():
+                try:
+                    await self._build(index)
+                except Exception as e:
+                    logger.error(f"Error building ID filter of {index}: {e}")
+            await asyncio.sleep(self.refresh)
+
+    async def _build(self, index: str) -> None:
+        # The scan may miss documents of IDs added shortly before it began
+        # (refresh lag), so the IDs added since the previous build began are
+        # kept as well.
+        previous, self._pending[index] = self._pending[index], set()
+        try:
+            count = (await self.elastic.count(index=index))["count"]
+            # Leave room for the IDs created until the next rebuild.
+            bloom_filter = BloomFilter(2 * count, self.error_rate)
+            async for hit in async_scan(
+                self.elastic,
+                index=index,
+                query={"query": {"match_all": {}}},
+                _source=False,
+            ):
+                bloom_filter.add(hit["_id"])
+        except BaseException:
+            self._pending[index] |= previous
+            raise
+
+        for id in previous | self._pending[index]:
+            bloom_filter.add(id)
+        self._filters[index] = bloom_filter
+        logger.info(f"Built ID filter of {index} with {count} IDs")
+
+
+def might_exist(index: str, id: object) -> bool:
+    """False only if the ID is certainly not in the index."""
+    return id_filters is None or id_filters.might_exist(index, str(id))
@@ -1,36 +1,426 @@
-import json
+import asyncio
 import logging
+import math
+import random
+import struct
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Union
-from uuid import UUID
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Union
+from uuid import UUID, uuid4
 
+import orjson
+from core.config import settings
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from services.hotkeys import CountMinSketch, HotKeyTracker
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
 
 logger = logging.getLogger(__name__)
 
+LEASE_CHANNEL = "cache:lease_released"
+GENERATION_KEY = "cache:generation:{namespace}"
+# Sorted set of the keys stored with the tag, scored by their expiry.
+TAG_KEY = "cache:tags:{tag}"
 
-class AsyncCacheEngine(ABC):
+# Returns the cached value, or takes the rebuild lease for the key when it is
+# free. The second element is 1 only for the caller that got the lease.
+# A hit with less than ARGV[4] ms to live has its TTL raised to ARGV[3] s.
+GET_OR_LEASE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if tonumber(ARGV[3]) > 0 and ttl >= 0 and ttl < tonumber(ARGV[4]) then
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+    end
+    return {value, 0}
+end
+if redis.call('SET', KEYS[2], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return {false, 1}
+end
+return {false, 0}
+"""
+
+# Drops the lease only if it is still held by the caller and wakes up the
+# workers waiting for the key.
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+redis.call('PUBLISH', ARGV[2], KEYS[1])
+return 1
+"""
+
+# Deletes every key recorded in the tag sets that has not expired by
+# ARGV[1] (a Unix time) along with the sets and returns the deleted keys.
+INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for _, tag in ipairs(KEYS) do
+    for _, key in ipairs(redis.call('ZRANGEBYSCORE', tag, ARGV[1], '+inf')) do
+        redis.call('DEL', key)
+        table.insert(deleted, key)
+    end
+    redis.call('DEL', tag)
+end
+return deleted
+"""
+
+
+# Every cached value starts with a fixed header: format version, codec id,
+# flags, soft expiry, hard expiry and compute cost. Readers skip entries with
+# an unknown version or codec. Keys also start with the format version, so
+# workers of a rolling deploy that predate the header, or use another
+# format, never read each other's entries.
+CACHE_FORMAT_VERSION = 1
+CACHE_KEY_PREFIX = f"v{CACHE_FORMAT_VERSION}"
+CACHE_HEADER = struct.Struct("!BBBddf")
+# Header-only entry recording that the object does not exist.
+NEGATIVE_FLAG = 0b100
+
+
+class _Negative:
+    def __repr__(self) -> str:
+        return "NEGATIVE"
+
+
+# Returned by the cache engines for negative entries, BaseCache turns it
+# into None for the services.
+NEGATIVE = _Negative()
+
+
+@dataclass
+class CacheEntry:
+    object: Any
+    soft_expire_at: float = math.inf
+    expire_at: float = math.inf
+    delta: float = 0.0
+
+
+class CacheCodec(ABC):
+    """Serializes a model or a page of models in a single pass."""
+
+    codec_id: int
+    name: str
+
+    @abstractmethod
+    def encode(self, object: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes, Object: Any) -> Any:
+        pass
+
+    @staticmethod
+    def _dump(object: Any, mode: str = "python") -> Any:
+        # Plain values (such as ID arrays) are stored as they are.
+        if isinstance(object, list):
+            return [
+                item.model_dump(mode=mode) if hasattr(item, "model_dump") else item
+                for item in object
+            ]
+        return object.model_dump(mode=mode)
+
+    @staticmethod
+    def _validate(data: Any, Object: Any) -> Any:
+        if Object is None:
+            return data
+        if isinstance(data, list):
+            return [Object.model_validate(item) for item in data]
+        return Object.model_validate(data)
+
+
+class OrjsonCacheCodec(CacheCodec):
+    codec_id = 1
+    name = "orjson"
+
+    def encode(self, object: Any) -> bytes:
+        return orjson.dumps(self._dump(object))
+
+    def decode(self, data: bytes, Object: Any) -> Any:
+        return self._validate(orjson.loads(data), Object)
+
+
+class MsgpackCacheCodec(CacheCodec):
+    codec_id = 2
+    name = "msgpack"
+
+    def encode(self, object: Any) -> bytes:
+        return msgpack.packb(self._dump(object, mode="json"))
+
+    def decode(self, data: bytes, Object: Any) -> Any:
+        return self._validate(msgpack.unpackb(data), Object)
+
+
+CACHE_CODECS: dict[int, CacheCodec] = {OrjsonCacheCodec.codec_id: OrjsonCacheCodec()}
+if msgpack is not None:
+    CACHE_CODECS[MsgpackCacheCodec.codec_id] = MsgpackCacheCodec()
+
+
+def get_cache_codec(name: str) -> CacheCodec:
+    for codec in CACHE_CODECS.values():
+        if codec.name == name:
+            return codec
+    raise ValueError(f"Cache codec {name} is not available")
+
+
+class CacheCompressor(ABC):
+    """Compresses encoded payloads; ``flag`` marks them in the header."""
+
+    flag: int
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        pass
+
+
+class ZstdCacheCompressor(CacheCompressor):
+    flag = 0b01
+    name = "zstd"
+
+    def __init__(self, level: int = 3, dictionary: bytes | None = None):
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class Lz4CacheCompressor(CacheCompressor):
+    flag = 0b10
+    name = "lz4"
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4.frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4.frame.decompress(data)
+
+
+COMPRESSION_FLAGS = ZstdCacheCompressor.flag | Lz4CacheCompressor.flag
+
+
+def get_cache_compressors(
+    zstd_level: int = 3, zstd_dictionary: bytes | None = None
+) -> list[CacheCompressor]:
+    """Compressors for every installed library, so any entry can be read."""
+    compressors = []
+    if zstandard is not None:
+        compressors.append(ZstdCacheCompressor(zstd_level, zstd_dictionary))
+    if lz4 is not None:
+        compressors.append(Lz4CacheCompressor())
+    return compressors
+
+
+def train_zstd_dictionary(samples: list[bytes], size: int) -> bytes:
+    """Train a zstd dictionary from sample cache payloads."""
+    if zstandard is None:
+        raise ValueError("zstandard is not installed")
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+def key_namespace(key: str) -> str:
+    """Namespace of a cache key, e.g. ``film`` for ``v1:film:<id>``."""
+    return key.split(":", 2)[1]
 
+
+class AsyncCacheEngine(ABC):
     @abstractmethod
     def _generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
         pass
 
+    @abstractmethod
+    async def generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
+        """Generate a key using the current generation of its namespace."""
+        pass
+
+    @abstractmethod
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Drop every key of the namespace at once, return its new generation."""
+        pass
+
     @abstractmethod
     async def get_from_cache(self, key: str, Object: Any) -> Any | None:
         pass
 
     @abstractmethod
-    async def put_to_cache(self, key: str, object: Any, expiration: int) -> None:
+    async def put_to_cache(
+        self,
+        key: str,
+        object: Any,
+        expiration: int,
+        soft_expiration: int | None = None,
+        delta: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> None:
+        """Store object; ``delta`` is how long it took to compute, in seconds."""
+        pass
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: list[str]) -> list[str]:
+        """Delete every key stored with any of the tags, return those keys."""
+        pass
+
+    @abstractmethod
+    async def delete(self, keys: list[str]) -> None:
+        pass
+
+    @abstractmethod
+    def pin_keys(self, keys: list[str]) -> None:
+        """Keep these keys in process memory, if the engine has any."""
+        pass
+
+    @abstractmethod
+    async def get_many(self, keys: list[str], Object: Any) -> list[Any | None]:
+        """Retrieve several objects at once, ``None`` for missing keys."""
+        pass
+
+    @abstractmethod
+    async def put_many(
+        self,
+        objects: dict[str, Any],
+        expiration: int,
+        soft_expiration: int | None = None,
+        only_missing: bool = False,
+        tags: dict[str, list[str]] | None = None,
+    ) -> None:
+        """Store several objects at once, skipping existing keys if asked."""
+        pass
+
+    @abstractmethod
+    async def get_or_lease(
+        self, key: str, Object: Any, extend_to: int | None = None
+    ) -> tuple[Any | None, str | None]:
+        """Return the cached object and/or a lease token to rebuild it."""
+        pass
+
+    @abstractmethod
+    async def release_lease(self, key: str, lease: str) -> None:
+        pass
+
+    @abstractmethod
+    async def wait_for_cache(self, key: str, Object: Any) -> Any | None:
+        """Wait until the lease holder fills the key or the wait times out."""
         pass
 
 
 class RedisCacheEngine(AsyncCacheEngine):
-    def __init__(self, redis: Redis):
+    def __init__(
+        self,
+        redis: Redis,
+        lease_expiration: int = 5000,
+        lease_wait: float = 3.0,
+        ttl_jitter: float = 0.0,
+        xfetch_beta: float = 0.0,
+        codec: CacheCodec | None = None,
+        compressor: CacheCompressor | None = None,
+        compression_threshold: int = 1024,
+        compressors: list[CacheCompressor] | None = None,
+        generation_namespaces: list[str] | None = None,
+        generation_refresh: float = 1.0,
+        extend_fraction: float = 0.1,
+        tag_expiration: int = 0,
+    ):
         self.redis = redis
+        # Share of ``extend_to`` left to live below which a hit is extended.
+        self.extend_fraction = extend_fraction
+        # Tag sets outlive this, so keys with extended TTLs stay tracked.
+        self.tag_expiration = tag_expiration
+        self.codec = codec or OrjsonCacheCodec()
+        self.compressor = compressor
+        self.compression_threshold = compression_threshold
+        self._decompressors = {
+            compressor.flag: compressor
+            for compressor in (compressors or get_cache_compressors())
+        }
+        self.lease_expiration = lease_expiration
+        self.lease_wait = lease_wait
+        self.ttl_jitter = ttl_jitter
+        self.xfetch_beta = xfetch_beta
+        self._get_or_lease_script = redis.register_script(GET_OR_LEASE_SCRIPT)
+        self._release_lease_script = redis.register_script(RELEASE_LEASE_SCRIPT)
+        self._invalidate_tags_script = redis.register_script(INVALIDATE_TAGS_SCRIPT)
+        self._lease_waiters: dict[str, set[asyncio.Future]] = defaultdict(set)
+        self._lease_listener: asyncio.Task | None = None
+        # Concurrent first waiters must not each start a listener.
+        self._lease_listener_lock = asyncio.Lock()
+        self.generation_namespaces = set(generation_namespaces or [])
+        self.generation_refresh = generation_refresh
+        self._generations: dict[str, tuple[float, int]] = {}
+        self._generation_loads: dict[str, asyncio.Future] = {}
 
     def _generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
         """Generates a cache key based on multiple arguments for flexibility."""
-        return ":".join(str(arg) for arg in args)
+        namespace = str(args[0])
+        if namespace in self.generation_namespaces:
+            generation = self._generations.get(namespace, (0.0, 0))[1]
+            args = (namespace, f"g{generation}", *args[1:])
+        return ":".join(str(arg) for arg in (CACHE_KEY_PREFIX, *args))
+
+    async def generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
+        namespace = str(args[0])
+        if namespace in self.generation_namespaces:
+            await self._refresh_generation(namespace)
+        return self._generate_cache_key(*args)
+
+    async def _refresh_generation(self, namespace: str) -> None:
+        """Re-read the namespace generation once it is older than the refresh."""
+        fetched = self._generations.get(namespace)
+        if fetched and time.monotonic() - fetched[0] < self.generation_refresh:
+            return
+
+        load = self._generation_loads.get(namespace)
+        if load is None:
+            load = asyncio.ensure_future(
+                self.redis.get(GENERATION_KEY.format(namespace=namespace))
+            )
+            self._generation_loads[namespace] = load
+            load.add_done_callback(
+                lambda _: self._generation_loads.pop(namespace, None)
+            )
+
+        try:
+            generation = await asyncio.shield(load)
+        except Exception as e:
+            # Keep serving the last known generation.
+            logger.error(f"Error reading generation of {namespace}: {e}")
+            return
+        self._generations[namespace] = (time.monotonic(), int(generation or 0))
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Bump the namespace generation, older keys expire by TTL."""
+        generation = await self.redis.incr(GENERATION_KEY.format(namespace=namespace))
+        self._generations[namespace] = (time.monotonic(), generation)
+        logger.info(f"Invalidated {namespace}, generation is now {generation}")
+        return generation
+
+    @staticmethod
+    def _lease_key(key: str) -> str:
+        return f"lease:{key}"
 
     async def get_from_cache(self, key: str, Object: Any) -> Any | None:
         cached_object = await self.redis.get(key)
@@ -38,54 +428,1015 @@ class RedisCacheEngine(AsyncCacheEngine):
             return None
 
         logger.info(f"Retrieved {key} from cache")
+        entry = self._deserialize(key, cached_object, Object)
+        return entry.object if entry else None
 
-        if isinstance(cached_object, bytes):
-            cached_object = cached_object.decode('utf-8')
+    def _deserialize(
+        self, key: str, cached_object: bytes, Object: Any
+    ) -> CacheEntry | None:
+        """Parse a cached value into the object and its expiry metadata."""
+        try:
+            header = CACHE_HEADER.unpack_from(cached_object)
+        except struct.error:
+            logger.error(f"Cached {key} has a malformed header")
+            return None
+        version, codec_id, flags, soft_expire_at, expire_at, delta = header
 
-        parsed_data = json.loads(cached_object)
-        if isinstance(parsed_data, list):
-            return json.dumps(parsed_data)
+        codec = CACHE_CODECS.get(codec_id)
+        compression = flags & COMPRESSION_FLAGS
+        if (
+            version != CACHE_FORMAT_VERSION
+            or codec is None
+            or (compression and compression not in self._decompressors)
+        ):
+            logger.warning(
+                f"Cached {key} has unsupported format {version}, "
+                f"codec {codec_id} or flags {flags}"
+            )
+            return None
 
-        return Object.parse_raw(cached_object)
+        if flags & NEGATIVE_FLAG:
+            return CacheEntry(NEGATIVE, soft_expire_at, expire_at, delta)
 
+        payload = cached_object[CACHE_HEADER.size :]
+        try:
+            if compression:
+                payload = self._decompressors[compression].decompress(payload)
+            cached_object = codec.decode(payload, Object)
+        except Exception as e:
+            logger.error(f"Unable to parse cached {key}: {e}")
+            return None
 
-    async def put_to_cache(self, key: str, object: Any, expiration: int) -> None:
-        if isinstance(object, list):
-            serialized_object = json.dumps([item.json() for item in object])
-        elif isinstance(object, str):
-            serialized_object = object
-        else:
-            serialized_object = object.json()
+        return CacheEntry(cached_object, soft_expire_at, expire_at, delta)
+
+    def _should_refresh(self, entry: CacheEntry) -> bool:
+        """Probabilistic early expiration (XFetch)."""
+        early = -entry.delta * self.xfetch_beta * math.log(1.0 - random.random())
+        return time.time() + early >= entry.soft_expire_at
+
+    async def put_to_cache(
+        self,
+        key: str,
+        object: Any,
+        expiration: int,
+        soft_expiration: int | None = None,
+        delta: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> None:
+        serialized_object, expiration = self._serialize(
+            object, expiration, soft_expiration, delta
+        )
 
         logger.info(f"Put to cache with key {key}")
 
-        await self.redis.set(key, serialized_object, expiration)
+        if not tags:
+            await self.redis.set(key, serialized_object, expiration)
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, serialized_object, expiration)
+            self._tag(pipe, key, tags, expiration, time.time())
+            await pipe.execute()
+
+    def _tag(
+        self, pipe: Pipeline, key: str, tags: list[str], expiration: int, now: float
+    ) -> None:
+        # Reads may extend the TTL of the key up to the tag expiration.
+        tag_expiration = max(expiration, self.tag_expiration)
+        for tag in set(tags):
+            tag_key = TAG_KEY.format(tag=tag)
+            pipe.zadd(tag_key, {key: now + tag_expiration})
+            # Drop the keys that expired (or were replaced by keys of a
+            # newer generation and aged out), so hot tags do not grow.
+            pipe.zremrangebyscore(tag_key, "-inf", now)
+            # Tag sets live as long as their longest-lived key.
+            pipe.expire(tag_key, tag_expiration, nx=True)
+            pipe.expire(tag_key, tag_expiration, gt=True)
+
+    async def invalidate_tags(self, tags: list[str]) -> list[str]:
+        if not tags:
+            return []
+        deleted = await self._invalidate_tags_script(
+            keys=[TAG_KEY.format(tag=tag) for tag in set(tags)], args=[time.time()]
+        )
+        deleted = [key.decode() if isinstance(key, bytes) else key for key in deleted]
+        logger.info(f"Invalidated {len(deleted)} keys tagged {tags}")
+        return deleted
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self.redis.delete(*keys)
+
+    def pin_keys(self, keys: list[str]) -> None:
+        pass
+
+    def _serialize(
+        self,
+        object: Any,
+        expiration: int,
+        soft_expiration: int | None,
+        delta: float,
+    ) -> tuple[bytes, int]:
+        """Encode object with its header, returns it with the jittered TTL."""
+        if soft_expiration is None:
+            soft_expiration = expiration
+
+        # Spread out expirations of entries written at the same time.
+        jitter = random.uniform(1 - self.ttl_jitter, 1 + self.ttl_jitter)
+        expiration = max(1, round(expiration * jitter))
+        if object is NEGATIVE:
+            payload, flags = b"", NEGATIVE_FLAG
+        else:
+            payload = self.codec.encode(object)
+            flags = 0
+        if self.compressor is not None and len(payload) >= self.compression_threshold:
+            payload = self.compressor.compress(payload)
+            flags |= self.compressor.flag
+
+        now = time.time()
+        header = CACHE_HEADER.pack(
+            CACHE_FORMAT_VERSION,
+            self.codec.codec_id,
+            flags,
+            now + soft_expiration * jitter,
+            now + expiration,
+            delta,
+        )
+        return header + payload, expiration
+
+    async def get_many(self, keys: list[str], Object: Any) -> list[Any | None]:
+        if not keys:
+            return []
+
+        cached_objects = await self.redis.mget(keys)
+        objects = []
+        for key, cached_object in zip(keys, cached_objects):
+            entry = (
+                self._deserialize(key, cached_object, Object) if cached_object else None
+            )
+            objects.append(entry.object if entry else None)
+
+        hits = sum(object is not None for object in objects)
+        logger.info(f"Retrieved {hits} of {len(keys)} keys from cache")
+        return objects
+
+    async def put_many(
+        self,
+        objects: dict[str, Any],
+        expiration: int,
+        soft_expiration: int | None = None,
+        only_missing: bool = False,
+        tags: dict[str, list[str]] | None = None,
+    ) -> None:
+        if not objects:
+            return
+
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, object in objects.items():
+                serialized_object, key_expiration = self._serialize(
+                    object, expiration, soft_expiration, 0.0
+                )
+                pipe.set(key, serialized_object, key_expiration, nx=only_missing)
+                if tags and tags.get(key):
+                    self._tag(pipe, key, tags[key], key_expiration, now)
+            await pipe.execute()
+
+        logger.info(f"Put {len(objects)} keys to cache")
+
+    async def _acquire_lease(self, key: str) -> str | None:
+        lease = uuid4().hex
+        if await self.redis.set(
+            self._lease_key(key), lease, px=self.lease_expiration, nx=True
+        ):
+            return lease
+        return None
+
+    async def get_or_lease(
+        self, key: str, Object: Any, extend_to: int | None = None
+    ) -> tuple[Any | None, str | None]:
+        lease = uuid4().hex
+        extend_to = extend_to or 0
+        cached_object, leased = await self._get_or_lease_script(
+            keys=[key, self._lease_key(key)],
+            args=[
+                lease,
+                self.lease_expiration,
+                extend_to,
+                round(extend_to * self.extend_fraction * 1000),
+            ],
+        )
+        if cached_object:
+            logger.info(f"Retrieved {key} from cache")
+            entry = self._deserialize(key, cached_object, Object)
+            if entry is None:
+                return None, await self._acquire_lease(key)
+
+            if not self._should_refresh(entry):
+                return entry.object, None
+
+            logger.debug(f"Cached {key} is due for refresh")
+            return entry.object, await self._acquire_lease(key)
+
+        if not leased:
+            return None, None
+
+        logger.debug(f"Acquired rebuild lease for {key}")
+        return None, lease
+
+    async def release_lease(self, key: str, lease: str) -> None:
+        await self._release_lease_script(
+            keys=[key, self._lease_key(key)], args=[lease, LEASE_CHANNEL]
+        )
+
+    async def wait_for_cache(self, key: str, Object: Any) -> Any | None:
+        await self._start_lease_listener()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._lease_waiters[key].add(waiter)
+        try:
+            # The key may have been filled before we subscribed.
+            cached_object = await self.get_from_cache(key, Object)
+            if cached_object is not None:
+                return cached_object
+
+            await asyncio.wait_for(waiter, self.lease_wait)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out waiting for {key} to be rebuilt")
+        finally:
+            self._lease_waiters[key].discard(waiter)
+            if not self._lease_waiters[key]:
+                del self._lease_waiters[key]
+
+        return await self.get_from_cache(key, Object)
+
+    async def _start_lease_listener(self) -> None:
+        async with self._lease_listener_lock:
+            if self._lease_listener is not None and not self._lease_listener.done():
+                return
+
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(LEASE_CHANNEL)
+            except Exception:
+                await pubsub.close()
+                raise
+            self._lease_listener = asyncio.create_task(self._listen_leases(pubsub))
+
+    async def _listen_leases(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                key = message["data"]
+                if isinstance(key, bytes):
+                    key = key.decode("utf-8")
+
+                for waiter in self._lease_waiters.get(key, ()):
+                    if not waiter.done():
+                        waiter.set_result(None)
+        except Exception as e:
+            logger.error(f"Lease listener stopped: {e}")
+        finally:
+            await pubsub.close()
+
+
+class TinyLfuCache:
+    """Bounded map evicting with the W-TinyLFU policy."""
+
+    def __init__(self, size: int, window_share: float = 0.01):
+        self.size = size
+        self.window_size = max(1, round(size * window_share))
+        self.main_size = max(0, size - self.window_size)
+        self.protected_size = round(self.main_size * 0.8)
+        self.window: OrderedDict[str, Any] = OrderedDict()
+        self.probation: OrderedDict[str, Any] = OrderedDict()
+        self.protected: OrderedDict[str, Any] = OrderedDict()
+        self.sketch = CountMinSketch(width=max(64, 4 * size))
+        # Requests counted since the sketch was last halved.
+        self._requests = 0
+        self._sample_size = 10 * size
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.window or key in self.probation or key in self.protected
+
+    def record(self, key: str) -> None:
+        """Count a request of the key, hit or miss."""
+        self.sketch.add(key)
+        self._requests += 1
+        if self._requests >= self._sample_size:
+            self.sketch.halve()
+            self._requests //= 2
+
+    def get(self, key: str) -> Any | None:
+        if key in self.window:
+            self.window.move_to_end(key)
+            return self.window[key]
+        if key in self.protected:
+            self.protected.move_to_end(key)
+            return self.protected[key]
+        if key in self.probation:
+            value = self.probation.pop(key)
+            self._protect(key, value)
+            return value
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        for segment in (self.window, self.protected, self.probation):
+            if key in segment:
+                segment[key] = value
+                segment.move_to_end(key)
+                return
+
+        self.window[key] = value
+        if len(self.window) > self.window_size:
+            self._admit(*self.window.popitem(last=False))
+
+    def pop(self, key: str) -> Any | None:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                return segment.pop(key)
+        return None
+
+    def _protect(self, key: str, value: Any) -> None:
+        self.protected[key] = value
+        if len(self.protected) > self.protected_size:
+            demoted, demoted_value = self.protected.popitem(last=False)
+            self.probation[demoted] = demoted_value
+
+    def _admit(self, candidate: str, value: Any) -> None:
+        if len(self.probation) + len(self.protected) < self.main_size:
+            self.probation[candidate] = value
+            return
+        if not self.probation:
+            return
+
+        victim = next(iter(self.probation))
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del self.probation[victim]
+            self.probation[candidate] = value
+
+
+class LocalCacheEngine(AsyncCacheEngine):
+    """In-process W-TinyLFU+TTL tier with per-namespace budgets."""
+
+    def __init__(
+        self,
+        cache_engine: AsyncCacheEngine,
+        sizes: dict[str, int],
+        expiration: int,
+        window_share: float = 0.01,
+    ):
+        self.cache_engine = cache_engine
+        self.sizes = sizes
+        self.expiration = expiration
+        self.window_share = window_share
+        self._entries: dict[str, TinyLfuCache] = {}
+        # Hot keys kept regardless of the namespace budget.
+        self._pinned: set[str] = set()
+        self._pinned_entries: dict[str, tuple[float, Any]] = {}
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key_namespace(key)
+
+    def _segment(self, key: str) -> TinyLfuCache | None:
+        namespace = self._namespace(key)
+        entries = self._entries.get(namespace)
+        if entries is None:
+            size = self.sizes.get(namespace, 0)
+            if size <= 0:
+                return None
+            entries = self._entries[namespace] = TinyLfuCache(size, self.window_share)
+        return entries
+
+    def _get_local(self, key: str, Object: Any) -> Any | None:
+        if key in self._pinned:
+            entry = self._pinned_entries.get(key)
+        else:
+            entries = self._segment(key)
+            if entries is None:
+                return None
+            entries.record(key)
+            entry = entries.get(key)
+        if entry is None:
+            return None
+
+        expire_at, value = entry
+        if expire_at <= time.monotonic():
+            self._pop_local(key)
+            return None
+
+        # A key may hold a lighter model than requested (a page Film under
+        # a FilmDetail key), leave those to the backend.
+        if (
+            Object is not None
+            and value is not NEGATIVE
+            and not all(
+                isinstance(item, Object)
+                for item in (value if isinstance(value, list) else [value])
+            )
+        ):
+            return None
+
+        return value
+
+    def _put_local(self, key: str, value: Any, expiration: int) -> None:
+        entry = (time.monotonic() + min(self.expiration, expiration), value)
+        if key in self._pinned:
+            self._pinned_entries[key] = entry
+            return
+
+        entries = self._segment(key)
+        if entries is not None:
+            entries.put(key, entry)
+
+    def _pop_local(self, key: str) -> None:
+        self._pinned_entries.pop(key, None)
+        entries = self._entries.get(self._namespace(key))
+        if entries is not None:
+            entries.pop(key)
+
+    def _generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
+        return self.cache_engine._generate_cache_key(*args)
+
+    async def generate_cache_key(self, *args: Union[str, int, UUID]) -> str:
+        return await self.cache_engine.generate_cache_key(*args)
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        self._entries.pop(namespace, None)
+        for key in list(self._pinned_entries):
+            if self._namespace(key) == namespace:
+                del self._pinned_entries[key]
+        return await self.cache_engine.invalidate_namespace(namespace)
+
+    async def get_from_cache(self, key: str, Object: Any) -> Any | None:
+        value = self._get_local(key, Object)
+        if value is not None:
+            return value
+
+        value = await self.cache_engine.get_from_cache(key, Object)
+        if value is not None:
+            self._put_local(key, value, self.expiration)
+        return value
+
+    async def put_to_cache(
+        self,
+        key: str,
+        object: Any,
+        expiration: int,
+        soft_expiration: int | None = None,
+        delta: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> None:
+        await self.cache_engine.put_to_cache(
+            key, object, expiration, soft_expiration, delta, tags
+        )
+        self._put_local(key, object, expiration)
+
+    async def invalidate_tags(self, tags: list[str]) -> list[str]:
+        deleted = await self.cache_engine.invalidate_tags(tags)
+        self.invalidate_local(deleted)
+        return deleted
+
+    async def delete(self, keys: list[str]) -> None:
+        self.invalidate_local(keys)
+        await self.cache_engine.delete(keys)
+
+    def pin_keys(self, keys: list[str]) -> None:
+        self._pinned = set(keys)
+        for key in list(self._pinned_entries):
+            if key not in self._pinned:
+                del self._pinned_entries[key]
+        # Entries already cached move out of their namespace budget.
+        for key in self._pinned - self._pinned_entries.keys():
+            entries = self._entries.get(self._namespace(key))
+            entry = entries.pop(key) if entries is not None else None
+            if entry is not None:
+                self._pinned_entries[key] = entry
+
+    def invalidate_local(self, keys: list[str] | None) -> None:
+        """Evict keys changed elsewhere, or everything if ``keys`` is None."""
+        if keys is None:
+            self._entries.clear()
+            self._pinned_entries.clear()
+            return
+        for key in keys:
+            self._pop_local(key)
+
+    async def get_or_lease(
+        self, key: str, Object: Any, extend_to: int | None = None
+    ) -> tuple[Any | None, str | None]:
+        value = self._get_local(key, Object)
+        if value is not None:
+            return value, None
+
+        value, lease = await self.cache_engine.get_or_lease(key, Object, extend_to)
+        if value is not None and lease is None:
+            self._put_local(key, value, self.expiration)
+        return value, lease
+
+    async def release_lease(self, key: str, lease: str) -> None:
+        await self.cache_engine.release_lease(key, lease)
+
+    async def wait_for_cache(self, key: str, Object: Any) -> Any | None:
+        value = await self.cache_engine.wait_for_cache(key, Object)
+        if value is not None:
+            self._put_local(key, value, self.expiration)
+        return value
+
+    async def get_many(self, keys: list[str], Object: Any) -> list[Any | None]:
+        values = [self._get_local(key, Object) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if not missing:
+            return values
+
+        fetched = dict(zip(missing, await self.cache_engine.get_many(missing, Object)))
+        for key, value in fetched.items():
+            if value is not None:
+                self._put_local(key, value, self.expiration)
+
+        return [
+            fetched.get(key) if value is None else value
+            for key, value in zip(keys, values)
+        ]
+
+    async def put_many(
+        self,
+        objects: dict[str, Any],
+        expiration: int,
+        soft_expiration: int | None = None,
+        only_missing: bool = False,
+        tags: dict[str, list[str]] | None = None,
+    ) -> None:
+        await self.cache_engine.put_many(
+            objects, expiration, soft_expiration, only_missing, tags
+        )
+        if only_missing:
+            return
+        for key, object in objects.items():
+            self._put_local(key, object, expiration)
+
+
+def _get_compression() -> tuple[CacheCompressor | None, list[CacheCompressor]]:
+    zstd_dictionary = None
+    if settings.cache_zstd_dictionary_path:
+        with open(settings.cache_zstd_dictionary_path, "rb") as dictionary_file:
+            zstd_dictionary = dictionary_file.read()
+
+    compressors = get_cache_compressors(settings.cache_zstd_level, zstd_dictionary)
+    if settings.cache_compression == "none":
+        return None, compressors
+
+    for compressor in compressors:
+        if compressor.name == settings.cache_compression:
+            return compressor, compressors
+    raise ValueError(f"Cache compression {settings.cache_compression} is not available")
+
+
+@lru_cache()
+def get_cache_engine(redis: Redis) -> AsyncCacheEngine:
+    """Build the cache engine stack shared by all services of the worker."""
+    compressor, compressors = _get_compression()
+    cache_engine = RedisCacheEngine(
+        redis,
+        lease_expiration=settings.cache_lease_expire_in_milliseconds,
+        lease_wait=settings.cache_lease_wait_in_seconds,
+        ttl_jitter=settings.cache_ttl_jitter,
+        xfetch_beta=settings.cache_xfetch_beta,
+        codec=get_cache_codec(settings.cache_codec),
+        compressor=compressor,
+        compression_threshold=settings.cache_compression_threshold,
+        compressors=compressors,
+        generation_namespaces=settings.cache_generation_namespaces,
+        generation_refresh=settings.cache_generation_refresh_in_seconds,
+        extend_fraction=settings.cache_ttl_extend_fraction,
+        # Tags must outlive the longest adapted TTL of the keys they list.
+        tag_expiration=(
+            settings.cache_max_expire_in_seconds
+            if settings.cache_adaptive_ttl_enabled
+            else 0
+        ),
+    )
+    if settings.local_cache_enabled:
+        cache_engine = LocalCacheEngine(
+            cache_engine,
+            settings.local_cache_sizes,
+            settings.local_cache_expire_in_seconds,
+            window_share=settings.local_cache_window_share,
+        )
+    return cache_engine
+
+
+@dataclass
+class AdaptiveTtl:
+    """Scales TTLs with the access rate of a key, within bounds."""
+
+    min_expiration: int
+    max_expiration: int
+    reference_rate: float = 0.1
+
+    def expiration(self, expiration: int, rate: float) -> int:
+        scaled = expiration * math.sqrt(rate / self.reference_rate)
+        return round(min(self.max_expiration, max(self.min_expiration, scaled)))
+
+    def is_hot(self, rate: float) -> bool:
+        return rate >= self.reference_rate
+
+
+def get_adaptive_ttl() -> AdaptiveTtl | None:
+    if not settings.cache_adaptive_ttl_enabled:
+        return None
+    if not settings.hot_keys_enabled:
+        # Access rates come from the hot key tracker.
+        raise ValueError("CACHE_ADAPTIVE_TTL_ENABLED requires HOT_KEYS_ENABLED")
+    return AdaptiveTtl(
+        settings.cache_min_expire_in_seconds,
+        settings.cache_max_expire_in_seconds,
+        settings.cache_adaptive_ttl_reference_rate,
+    )
+
+
+@dataclass
+class CacheLoad:
+    """What BaseCache needs to read a key and rebuild it on a miss."""
+
+    key: str
+    Object: Any
+    loader: Callable[[], Awaitable[Any]]
+    expiration: int
+    soft_expiration: int | None = None
+    entity_name: str | None = None
+    # Builds the invalidation tags of the loaded object.
+    tags: Callable[[Any], list[str]] | None = None
+    # TTL of the negative entry stored when the loader finds nothing.
+    negative_expiration: int = 0
+    # TTL a hit close to expiring is extended to.
+    extend_to: int | None = None
 
 
 class BaseCache:
-    def __init__(self, cache_engine: AsyncCacheEngine):
+    """Cache facade used by the services."""
+
+    def __init__(
+        self,
+        cache_engine: AsyncCacheEngine,
+        normalized: bool = False,
+        negative_expiration: int = 0,
+        hot_keys: HotKeyTracker | None = None,
+        adaptive_ttl: AdaptiveTtl | None = None,
+    ):
         self.cache_engine = cache_engine
+        self.normalized = normalized
+        self.negative_expiration = negative_expiration
+        if adaptive_ttl is not None and hot_keys is None:
+            raise ValueError("Adaptive TTLs need a hot key tracker")
+        self.hot_keys = hot_keys
+        self.adaptive_ttl = adaptive_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshes: set[asyncio.Task] = set()
+        # Loads of the tracked keys, replayed to keep hot keys fresh.
+        self._hot_loads: dict[str, CacheLoad] = {}
+        if hot_keys is not None:
+            hot_keys.register(self)
 
     async def get_by_id(
         self, object_name: str, object_id: UUID, Object: Any
     ) -> Any | None:
         """Retrieve object by its name and ID from cache."""
-        key = self.cache_engine._generate_cache_key(object_name, object_id)
-        return await self.cache_engine.get_from_cache(key, Object)
+        key = await self.cache_engine.generate_cache_key(object_name, object_id)
+        return self._positive(await self.cache_engine.get_from_cache(key, Object))
 
-    async def put_by_id(self, object_name: str, object: Any, expiration: int) -> None:
+    async def put_by_id(
+        self,
+        object_name: str,
+        object: Any,
+        expiration: int,
+        soft_expiration: int | None = None,
+    ) -> None:
         """Store object by its name and ID in cache."""
-        key = self.cache_engine._generate_cache_key(object_name, object.id)
-        await self.cache_engine.put_to_cache(key, object, expiration)
+        key = await self.cache_engine.generate_cache_key(object_name, object.id)
+        load = self._adapt(CacheLoad(key, None, None, expiration, soft_expiration))
+        await self.cache_engine.put_to_cache(
+            key, object, load.expiration, load.soft_expiration
+        )
 
-    async def get_by_key(self, *args: Union[str, int], Object: Any) -> Any | None:
+    async def get_by_key(
+        self, *args: Union[str, int], Object: Any, entity_name: str | None = None
+    ) -> Any | None:
         """Retrieve object from cache using a flexible key."""
-        key = self.cache_engine._generate_cache_key(*args)
-        return await self.cache_engine.get_from_cache(key, Object)
+        key = await self.cache_engine.generate_cache_key(*args)
+        if not self._is_normalized(entity_name):
+            return self._positive(await self.cache_engine.get_from_cache(key, Object))
+
+        ids = await self.cache_engine.get_from_cache(key, None)
+        return await self._get_entities(ids, entity_name, Object)
 
     async def put_by_key(
-        self, object: Any, expiration: int, *args: Union[str, int]
+        self,
+        object: Any,
+        expiration: int,
+        *args: Union[str, int],
+        soft_expiration: int | None = None,
+        entity_name: str | None = None,
+        tags: list[str] | None = None,
     ) -> None:
         """Store object in cache using a flexible key."""
-        key = self.cache_engine._generate_cache_key(*args)
-        await self.cache_engine.put_to_cache(key, object, expiration)
+        key = await self.cache_engine.generate_cache_key(*args)
+        load = CacheLoad(
+            key,
+            None,
+            None,
+            expiration,
+            soft_expiration,
+            entity_name,
+            tags=lambda _: tags or [],
+        )
+        await self._put(self._adapt(load), object)
+
+    async def get_many_by_id(
+        self, object_name: str, object_ids: list[UUID], Object: Any
+    ) -> list[Any | None]:
+        """Retrieve objects by their name and IDs in one round trip."""
+        keys = [
+            await self.cache_engine.generate_cache_key(object_name, object_id)
+            for object_id in object_ids
+        ]
+        return [
+            self._positive(object)
+            for object in await self.cache_engine.get_many(keys, Object)
+        ]
+
+    async def put_many_by_id(
+        self,
+        object_name: str,
+        objects: list[Any],
+        expiration: int,
+        soft_expiration: int | None = None,
+        only_missing: bool = False,
+        tags: Callable[[Any], list[str]] | None = None,
+    ) -> None:
+        """Store objects by their name and IDs in one round trip."""
+        generate_cache_key = self.cache_engine.generate_cache_key
+        keyed = {
+            await generate_cache_key(object_name, object.id): object
+            for object in objects
+        }
+        await self.cache_engine.put_many(
+            keyed,
+            expiration,
+            soft_expiration,
+            only_missing,
+            {key: tags(object) for key, object in keyed.items()} if tags else None,
+        )
+
+    async def get_or_load_by_id(
+        self,
+        object_name: str,
+        object_id: UUID,
+        Object: Any,
+        loader: Callable[[], Awaitable[Any]],
+        expiration: int,
+        soft_expiration: int | None = None,
+        tags: Callable[[Any], list[str]] | None = None,
+    ) -> Any | None:
+        """Retrieve object by its name and ID, loading it once on a cache miss."""
+        key = await self.cache_engine.generate_cache_key(object_name, object_id)
+        load = CacheLoad(
+            key,
+            Object,
+            loader,
+            expiration,
+            soft_expiration,
+            tags=tags,
+            negative_expiration=self.negative_expiration,
+        )
+        self._track(load)
+        return await self._get_or_load(load)
+
+    async def get_or_load_by_key(
+        self,
+        *args: Union[str, int],
+        Object: Any,
+        loader: Callable[[], Awaitable[Any]],
+        expiration: int,
+        soft_expiration: int | None = None,
+        entity_name: str | None = None,
+        tags: Callable[[Any], list[str]] | None = None,
+    ) -> Any | None:
+        """Retrieve object by a flexible key, loading it once on a cache miss."""
+        key = await self.cache_engine.generate_cache_key(*args)
+        load = CacheLoad(
+            key, Object, loader, expiration, soft_expiration, entity_name, tags
+        )
+        self._track(load)
+        return await self._get_or_load(load)
+
+    async def invalidate_by_id(self, object_name: str, object_id: UUID) -> None:
+        """Remove the object stored by its name and ID, and its page item."""
+        keys = [await self.cache_engine.generate_cache_key(object_name, object_id)]
+        if self.normalized:
+            keys.append(
+                await self.cache_engine.generate_cache_key(
+                    self._item_namespace(object_name), object_id
+                )
+            )
+        await self.cache_engine.delete(keys)
+
+    async def invalidate_tags(self, *tags: str) -> list[str]:
+        """Drop every key stored with any of the tags, e.g. ``film:<id>``."""
+        return await self.cache_engine.invalidate_tags(list(tags))
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate every key of the namespace, e.g. ``films_list``."""
+        return await self.cache_engine.invalidate_namespace(namespace)
+
+    def _adapt(self, load: CacheLoad) -> CacheLoad:
+        """Scale the TTLs of the load with the access rate of its key."""
+        if self.adaptive_ttl is None or load.extend_to is not None:
+            return load
+
+        rate = self.hot_keys.rate(load.key)
+        expiration = self.adaptive_ttl.expiration(load.expiration, rate)
+        soft_expiration = load.soft_expiration
+        if soft_expiration is not None:
+            soft_expiration = max(
+                1, round(soft_expiration * expiration / load.expiration)
+            )
+        return replace(
+            load,
+            expiration=expiration,
+            soft_expiration=soft_expiration,
+            # Only hot keys are kept alive by their reads.
+            extend_to=expiration if self.adaptive_ttl.is_hot(rate) else 0,
+        )
+
+    def _track(self, load: CacheLoad) -> None:
+        if self.hot_keys is not None and self.hot_keys.record(load.key):
+            self._hot_loads[load.key] = load
+
+    async def promote_hot_keys(self, keys: list[str]) -> None:
+        """Pin hot keys in process memory and refresh them in the background."""
+        self.cache_engine.pin_keys(keys)
+        self._hot_loads = {
+            key: load
+            for key, load in self._hot_loads.items()
+            if self.hot_keys.is_tracked(key)
+        }
+
+        results = await asyncio.gather(
+            *[
+                self._get_or_load(self._hot_loads[key])
+                for key in keys
+                if key in self._hot_loads
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error refreshing hot key: {result}")
+
+    @staticmethod
+    def _positive(object: Any) -> Any | None:
+        return None if object is NEGATIVE else object
+
+    def _is_normalized(self, entity_name: str | None) -> bool:
+        return self.normalized and entity_name is not None
+
+    @staticmethod
+    def _item_namespace(entity_name: str) -> str:
+        return f"{entity_name}_item"
+
+    async def _get_entities(
+        self, ids: list[str] | None, entity_name: str, Object: Any
+    ) -> list[Any] | None:
+        """Resolve a cached ID array, ``None`` unless every entity is cached."""
+        if not isinstance(ids, list) or not all(isinstance(id, str) for id in ids):
+            return None
+
+        entities = await self.get_many_by_id(
+            self._item_namespace(entity_name), ids, Object
+        )
+        if any(entity is None for entity in entities):
+            return None
+        return entities
+
+    async def _get(self, load: CacheLoad) -> tuple[Any | None, str | None]:
+        if not self._is_normalized(load.entity_name):
+            return await self.cache_engine.get_or_lease(
+                load.key, load.Object, load.extend_to
+            )
+
+        ids, lease = await self.cache_engine.get_or_lease(
+            load.key, None, load.extend_to
+        )
+        if ids is None:
+            return None, lease
+        entities = await self._get_entities(ids, load.entity_name, load.Object)
+        return entities, lease
+
+    async def _wait(self, load: CacheLoad) -> Any | None:
+        if not self._is_normalized(load.entity_name):
+            return await self.cache_engine.wait_for_cache(load.key, load.Object)
+
+        ids = await self.cache_engine.wait_for_cache(load.key, None)
+        return await self._get_entities(ids, load.entity_name, load.Object)
+
+    async def _put(self, load: CacheLoad, object: Any, delta: float = 0.0) -> None:
+        tags = load.tags(object) if load.tags else None
+        if not self._is_normalized(load.entity_name) or not isinstance(object, list):
+            await self.cache_engine.put_to_cache(
+                load.key, object, load.expiration, load.soft_expiration, delta, tags
+            )
+            return
+
+        await self.put_many_by_id(
+            self._item_namespace(load.entity_name),
+            object,
+            load.expiration,
+            # Tags are built from lists, the ones of a page or of one item.
+            tags=(lambda entity: load.tags([entity])) if load.tags else None,
+        )
+        await self.cache_engine.put_to_cache(
+            load.key,
+            [str(entity.id) for entity in object],
+            load.expiration,
+            load.soft_expiration,
+            delta,
+            tags,
+        )
+
+    async def _get_or_load(self, load: CacheLoad) -> Any | None:
+        """Single-flight cache read with stale-while-revalidate."""
+        load = self._adapt(load)
+        key = load.key
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            logger.debug(f"Waiting for in-flight load of {key}")
+            return self._positive(await asyncio.shield(inflight))
+
+        cached_object, lease = await self._get(load)
+        if cached_object is not None:
+            if lease is not None:
+                self._refresh(load, lease)
+            return self._positive(cached_object)
+
+        # Another coroutine may have started a load meanwhile; join it unless
+        # we are the one holding the lease.
+        inflight = self._inflight.get(key)
+        if inflight is None or lease is not None:
+            inflight = asyncio.ensure_future(self._load(load, lease))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(
+                lambda done: self._inflight.pop(key)
+                if self._inflight.get(key) is done
+                else None
+            )
+
+        return self._positive(await asyncio.shield(inflight))
+
+    async def _load(self, load: CacheLoad, lease: str | None) -> Any | None:
+        """Rebuild the key, letting only the lease holder run the loader."""
+        if lease is None:
+            cached_object = await self._wait(load)
+            if cached_object is not None:
+                return cached_object
+
+        try:
+            started_at = time.monotonic()
+            loaded_object = await load.loader()
+            await self._store(load, loaded_object, time.monotonic() - started_at)
+        finally:
+            if lease is not None:
+                await self.cache_engine.release_lease(load.key, lease)
+        return loaded_object
+
+    async def _store(self, load: CacheLoad, loaded_object: Any, delta: float) -> None:
+        if loaded_object is not None:
+            await self._put(load, loaded_object, delta)
+        elif load.negative_expiration > 0:
+            await self.cache_engine.put_to_cache(
+                load.key, NEGATIVE, load.negative_expiration
+            )
+
+    def _refresh(self, load: CacheLoad, lease: str) -> None:
+        """Refresh a key in the background while it keeps being served."""
+
+        async def refresh():
+            try:
+                started_at = time.monotonic()
+                loaded_object = await load.loader()
+                await self._store(load, loaded_object, time.monotonic() - started_at)
+                logger.debug(f"Refreshed stale {load.key}")
+            except Exception as e:
+                logger.error(f"Error refreshing {load.key}: {e}")
+            finally:
+                await self.cache_engine.release_lease(load.key, lease)
+
+        task = asyncio.create_task(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
@@ -0,0 +1,243 @@
+"""Cache invalidation driven by ETL change events.
+
+The ETL appends an entry to a Redis Stream for every document it writes:
+
+    XADD cache:events * entity film id <uuid> op upsert
+
+``entity`` is one of film, genre or person and ``op`` is upsert (default)
+or delete. Every API worker joins the same consumer group, so each event is
+handled once. The ID filters (services.bloom) read the stream apart from
+the group, so that every worker sees every new ID.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any
+from uuid import UUID
+
+from core.config import settings
+from elasticsearch import AsyncElasticsearch
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from services.film import get_film_service
+from services.genre import get_genre_service
+from services.person import get_person_service
+
+logger = logging.getLogger(__name__)
+
+ENTITY_INDICES = {
+    "film": settings.movies_index,
+    "genre": settings.genres_index,
+    "person": settings.persons_index,
+}
+
+consumer: "CacheEventConsumer | None" = None
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _parse_xreadgroup(response: Any) -> list:
+    """Parse an XREADGROUP reply, with None fields for trimmed entries."""
+    if response is None:
+        return []
+    return [
+        [
+            stream,
+            [
+                (
+                    entry_id,
+                    None if fields is None else dict(zip(fields[::2], fields[1::2])),
+                )
+                for entry_id, fields in entries
+            ],
+        ]
+        for stream, entries in response
+    ]
+
+
+class CacheEventConsumer:
+    """Reads change events in batches and invalidates the affected keys.
+
+    For every changed entity its own key and every key tagged with it (the
+    list pages containing it) are dropped. With ``rebuild`` the entity is
+    loaded again right away through its service, so the next request hits
+    a warm cache.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        services: dict[str, Any],
+        stream: str,
+        group: str,
+        batch_size: int = 100,
+        block: int = 5000,
+        claim_idle: int = 60000,
+        rebuild: bool = True,
+    ):
+        self.redis = redis
+        self.services = services
+        self.stream = stream
+        self.group = group
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block = block
+        self.claim_idle = claim_idle
+        self.rebuild = rebuild
+        self._task: asyncio.Task | None = None
+        # When to look for abandoned events and consumers again.
+        self._next_claim = 0.0
+        redis.set_response_callback("XREADGROUP", _parse_xreadgroup)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _create_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(
+                self.stream, self.group, id="$", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _claim_abandoned(self) -> None:
+        """Take over events left unacknowledged by consumers that went away."""
+        start_id = "0-0"
+        while True:
+            start_id, *_ = await self.redis.xautoclaim(
+                self.stream,
+                self.group,
+                self.name,
+                min_idle_time=self.claim_idle,
+                start_id=start_id,
+                count=self.batch_size,
+            )
+            if _decode(start_id) == "0-0":
+                return
+
+    async def _remove_stale_consumers(self) -> None:
+        """Delete idle consumers of stopped workers with nothing pending."""
+        for consumer in await self.redis.xinfo_consumers(self.stream, self.group):
+            name = _decode(consumer["name"])
+            if (
+                name != self.name
+                and consumer["pending"] == 0
+                and consumer["idle"] >= self.claim_idle
+            ):
+                await self.redis.xgroup_delconsumer(self.stream, self.group, name)
+                logger.info(f"Removed stale cache event consumer {name}")
+
+    async def _run(self) -> None:
+        # Pending events (claimed or delivered before a restart) go first.
+        last_id = "0"
+        while True:
+            try:
+                if time.monotonic() >= self._next_claim:
+                    last_id = "0"
+                if last_id == "0":
+                    await self._create_group()
+                    await self._claim_abandoned()
+                    await self._remove_stale_consumers()
+                    self._next_claim = time.monotonic() + self.claim_idle / 1000
+
+                response = await self.redis.xreadgroup(
+                    self.group,
+                    self.name,
+                    {self.stream: last_id},
+                    count=self.batch_size,
+                    block=None if last_id == "0" else self.block,
+                )
+                entries = response[0][1] if response else []
+                if not entries:
+                    last_id = ">"
+                    continue
+
+                await self._handle(entries)
+                await self.redis.xack(
+                    self.stream, self.group, *[entry_id for entry_id, _ in entries]
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error consuming cache events: {e}")
+                last_id = "0"
+                await asyncio.sleep(1)
+
+    async def _handle(self, entries: list[tuple[Any, dict]]) -> None:
+        # Several events for one entity in a batch collapse into the last one.
+        events: dict[tuple[str, UUID], str] = {}
+        for entry_id, fields in entries:
+            if fields is None:
+                # Acknowledged with the batch, so it is not read again.
+                logger.warning(f"Skipping trimmed cache event {_decode(entry_id)}")
+                continue
+            fields = {_decode(key): _decode(value) for key, value in fields.items()}
+            try:
+                entity, object_id = fields["entity"], UUID(fields["id"])
+            except (KeyError, ValueError):
+                logger.warning(f"Skipping malformed cache event {_decode(entry_id)}")
+                continue
+            if entity not in self.services:
+                logger.warning(f"Skipping cache event for unknown entity {entity}")
+                continue
+            events[(entity, object_id)] = fields.get("op", "upsert")
+
+        if not events:
+            return
+
+        for entity, object_id in events:
+            await self.services[entity].cache_engine.invalidate_by_id(entity, object_id)
+
+        # All services share the cache engine, so any of them can drop tags.
+        cache_engine = next(iter(self.services.values())).cache_engine
+        await cache_engine.invalidate_tags(
+            *[f"{entity}:{object_id}" for entity, object_id in events]
+        )
+        logger.info(f"Invalidated cache for {len(events)} changed entities")
+
+        if self.rebuild:
+            results = await asyncio.gather(
+                *[
+                    self.services[entity].get_by_id(object_id)
+                    for (entity, object_id), op in events.items()
+                    if op != "delete"
+                ],
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error rebuilding cache: {result}")
+
+
+def get_cache_event_consumer(
+    redis: Redis, elastic: AsyncElasticsearch
+) -> CacheEventConsumer:
+    return CacheEventConsumer(
+        redis,
+        {
+            "film": get_film_service(redis, elastic),
+            "genre": get_genre_service(redis, elastic),
+            "person": get_person_service(redis, elastic),
+        },
+        stream=settings.cache_events_stream,
+        group=settings.cache_events_group,
+        batch_size=settings.cache_events_batch_size,
+        block=settings.cache_events_block_ms,
+        claim_idle=settings.cache_events_claim_idle_ms,
+        rebuild=settings.cache_events_rebuild,
+    )
@@ -1,4 +1,3 @@
-import json
 import logging
 from functools import lru_cache
 from uuid import UUID, uuid4
@@ -10,11 +9,24 @@ from elasticsearch import AsyncElasticsearch, NotFoundError
 from fastapi import Depends
 from models.film import Film, FilmDetail
 from redis.asyncio import Redis
-from services.cache import BaseCache, RedisCacheEngine
-from services.search import BaseSearch, ElasticAsyncSearchEngine
+from services import bloom
+from services.cache import BaseCache, get_adaptive_ttl, get_cache_engine
+from services.hotkeys import get_hot_key_tracker
+from services.search import BaseSearch, get_search
 
 logger = logging.getLogger(__name__)
 
+# Fields of the film documents read for list pages and for film details,
+# the rest of the documents is not fetched.
+FILM_FIELDS = ["id", "title", "imdb_rating"]
+FILM_DETAIL_FIELDS = FILM_FIELDS + [
+    "description",
+    "genres",
+    "actors",
+    "writers",
+    "directors",
+]
+
 
 class FilmService:
     def __init__(self, cache_engine: BaseCache, search_engine: BaseSearch):
@@ -22,11 +34,36 @@ class FilmService:
         self.cache_engine = cache_engine
 
     async def get_by_id(self, film_id: UUID) -> FilmDetail | None:
+        if not bloom.might_exist(settings.movies_index, film_id):
+            logger.debug(f"Film {film_id} is not in the ID filter")
+            return None
+
+        film = await self.cache_engine.get_or_load_by_id(
+            "film",
+            film_id,
+            FilmDetail,
+            loader=lambda: self._get_film_from_elastic(film_id),
+            expiration=settings.film_cache_expire_in_seconds,
+            soft_expiration=settings.film_cache_soft_expire_in_seconds,
+            tags=self._get_film_tags,
+        )
+
+        logger.info(f"Retrieved film: {film}")
+        return film
 
-        film = await self.cache_engine.get_by_id("film", film_id, FilmDetail)
+    @staticmethod
+    def _get_film_tags(film: FilmDetail) -> list[str]:
+        persons = film.actors + film.writers + film.directors
+        return (
+            [f"film:{film.id}"]
+            + [f"genre:{genre.id}" for genre in film.genres]
+            + [f"person:{person.id}" for person in persons]
+        )
+
+    async def _get_film_from_elastic(self, film_id: UUID) -> FilmDetail | None:
         try:
             film_data = await self.search_engine.get_by_id(
-                settings.movies_index, film_id
+                settings.movies_index, film_id, FILM_DETAIL_FIELDS
             )
 
             if not film_data:
@@ -36,8 +73,9 @@ class FilmService:
             return None
 
         except Exception as e:
+            # Not a miss: re-raise so the error is not cached as a missing film.
             logger.error(f"Error retrieving film by id {film_id}: {e}")
-            return None
+            raise
 
         if "genres" in film_data:
             film_data["genres"] = [
@@ -67,22 +105,38 @@ class FilmService:
                 for director in film_data["directors"]
             ]
 
-        film = FilmDetail(**film_data)
+        return FilmDetail(**film_data)
 
-        await self.cache_engine.put_by_id(
-            "film", film, settings.film_cache_expire_in_seconds
+    async def get_list(self, sort, genre, page_size, page_number):
+        return await self.cache_engine.get_or_load_by_key(
+            "films_list",
+            page_size,
+            page_number,
+            sort,
+            genre,
+            Object=Film,
+            loader=lambda: self._get_list_from_elastic(
+                sort, genre, page_size, page_number
+            ),
+            expiration=settings.film_cache_expire_in_seconds,
+            soft_expiration=settings.film_cache_soft_expire_in_seconds,
+            entity_name="film",
+            tags=lambda films: [f"film:{film.id}" for film in films]
+            + ([f"genre:{genre}"] if genre else []),
         )
 
-        logger.info(f"Retrieved film: {film}")
-        return film
-
-    async def get_list(self, sort, genre, page_size, page_number):
-        cache_key_args = ("films_list", page_size, page_number, sort)
-        cached_data = await self.cache_engine.get_by_key(*cache_key_args, Object=Film)
+    async def get_list_page(self, sort, genre, page_size, cursor):
+        """Films at an opaque cursor and the cursor of the next page.
 
-        if cached_data:
-            return [Film.parse_raw(film) for film in json.loads(cached_data)]
+        Cursor pages cost the same at any depth and are not cached.
+        """
+        query, sort = await self._get_list_query(sort, genre)
+        films_list, next_cursor = await self.search_engine.search_page(
+            settings.movies_index, query, page_size, sort, cursor, FILM_FIELDS
+        )
+        return [Film(**get_film) for get_film in films_list], next_cursor
 
+    async def _get_list_query(self, sort, genre):
         query = {"match_all": {}}
         logger.debug(
             f"Search type {sort}",
@@ -93,7 +147,9 @@ class FilmService:
 
         if genre:
             genre_response = await self.search_engine.search(
-                index=settings.genres_index, query={"multi_match": {"query": genre}}
+                index=settings.genres_index,
+                query={"multi_match": {"query": genre}},
+                source=["name"],
             )
             genre_names = " ".join(
                 [genre["_source"]["name"] for genre in genre_response["hits"]["hits"]]
@@ -104,15 +160,24 @@ class FilmService:
             if genre_names:
                 query = {"bool": {"must": [{"term": {"genres": genre_names}}]}}
 
+        # The unique id breaks ties, so pages neither skip nor repeat films.
+        return {"bool": {"must": [query]}}, [
+            {"imdb_rating": {"order": sort_type}},
+            {"id": {"order": "asc"}},
+        ]
+
+    async def _get_list_from_elastic(self, sort, genre, page_size, page_number):
+        query, sort = await self._get_list_query(sort, genre)
         offset = (page_number - 1) * page_size
 
         try:
             films_list = await self.search_engine.search(
                 index=settings.movies_index,
-                query={"bool": {"must": [query]}},
-                sort=[{"imdb_rating": {"order": sort_type}}],
+                query=query,
+                sort=sort,
                 from_=offset,
                 size=page_size,
+                source=FILM_FIELDS,
             )
 
             logger.debug(f"Retrieved films {films_list}")
@@ -120,19 +185,10 @@ class FilmService:
             return None
 
         if isinstance(films_list, dict):
-            films = [
+            return [
                 Film(**get_film["_source"]) for get_film in films_list["hits"]["hits"]
             ]
-        else:
-            films = [Film(**get_film) for get_film in films_list]
-
-        await self.cache_engine.put_by_key(
-            json.dumps([film.json() for film in films]),
-            settings.film_cache_expire_in_seconds,
-            *cache_key_args,
-        )
-
-        return films
+        return [Film(**get_film) for get_film in films_list]
 
     async def search_film(self, query, page_size, page_number):
         offset = (page_number - 1) * page_size
@@ -142,6 +198,7 @@ class FilmService:
                 from_=offset,
                 size=page_size,
                 query={"multi_match": {"query": query}},
+                source=FILM_FIELDS,
             )
         except NotFoundError:
             return None
@@ -159,10 +216,14 @@ def get_film_service(
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> FilmService:
 
-    redis_cache_engine = RedisCacheEngine(redis)
-    cache_engine = BaseCache(redis_cache_engine)
+    cache_engine = BaseCache(
+        get_cache_engine(redis),
+        normalized=settings.cache_normalized,
+        negative_expiration=settings.negative_cache_expire_in_seconds,
+        hot_keys=get_hot_key_tracker(redis),
+        adaptive_ttl=get_adaptive_ttl(),
+    )
 
-    elastic_search_engine = ElasticAsyncSearchEngine(elastic)
-    search_engine = BaseSearch(search_engine=elastic_search_engine)
+    search_engine = get_search(elastic)
 
     return FilmService(cache_engine, search_engine)
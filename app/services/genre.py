@@ -1,4 +1,3 @@
-import json
 import logging
 from functools import lru_cache
 from uuid import UUID
@@ -10,11 +9,16 @@ from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 from models.genre import Genre
 from redis.asyncio import Redis
-from services.cache import BaseCache, RedisCacheEngine
-from services.search import BaseSearch, ElasticAsyncSearchEngine
+from services import bloom
+from services.cache import BaseCache, get_adaptive_ttl, get_cache_engine
+from services.hotkeys import get_hot_key_tracker
+from services.search import BaseSearch, get_search
 
 logger = logging.getLogger(__name__)
 
+# Fields of the genre documents the API reads.
+GENRE_FIELDS = ["id", "name"]
+
 
 class GenreService:
     def __init__(self, cache_engine: BaseCache, search_engine: BaseSearch):
@@ -22,30 +26,63 @@ class GenreService:
         self.cache_engine = cache_engine
 
     async def get_by_id(self, genre_id: UUID) -> Genre | None:
-        genre = await self.cache_engine.get_by_id('genre', genre_id, Genre)
+        if not bloom.might_exist(settings.genres_index, genre_id):
+            logger.debug(f"Genre {genre_id} is not in the ID filter")
+            return None
 
-        if not genre:
-            genre_data = await self.search_engine.get_by_id(
-                settings.genres_index, genre_id
-            )
+        genre = await self.cache_engine.get_or_load_by_id(
+            "genre",
+            genre_id,
+            Genre,
+            loader=lambda: self._get_genre_from_elastic(genre_id),
+            expiration=settings.genre_cache_expire_in_seconds,
+            soft_expiration=settings.genre_cache_soft_expire_in_seconds,
+            tags=lambda genre: [f"genre:{genre.id}"],
+        )
 
-            if not genre_data:
-                return None
+        logger.info(f"Retrieved genre: {genre}")
+        return genre
 
-            genre = Genre(**genre_data)
+    async def _get_genre_from_elastic(self, genre_id: UUID) -> Genre | None:
+        genre_data = await self.search_engine.get_by_id(
+            settings.genres_index, genre_id, GENRE_FIELDS
+        )
 
-            await self.cache_engine.put_by_id('genre', genre, settings.genre_cache_expire_in_seconds)
+        if not genre_data:
+            return None
 
-        logger.info(f"Retrieved genre: {genre}")
-        return genre
+        return Genre(**genre_data)
 
     async def get_list(self, page_number: int, page_size: int) -> list[Genre] | None:
-        cache_key_args = ("genres_list", page_size, page_number)
-        cached_data = await self.cache_engine.get_by_key(*cache_key_args, Object=Genre)
+        return await self.cache_engine.get_or_load_by_key(
+            "genres_list",
+            page_size,
+            page_number,
+            Object=Genre,
+            loader=lambda: self._get_list_from_elastic(page_number, page_size),
+            expiration=settings.genre_cache_expire_in_seconds,
+            soft_expiration=settings.genre_cache_soft_expire_in_seconds,
+            entity_name="genre",
+            tags=lambda genres: [f"genre:{genre.id}" for genre in genres],
+        )
 
-        if cached_data:
-            return [Genre.parse_raw(genre) for genre in json.loads(cached_data)]
+    async def get_list_page(
+        self, page_size: int, cursor: str
+    ) -> tuple[list[Genre], str | None]:
+        """Genres at an opaque cursor and the cursor of the next page."""
+        genres_list, next_cursor = await self.search_engine.search_page(
+            settings.genres_index,
+            {"match_all": {}},
+            page_size,
+            [{"id": {"order": "asc"}}],
+            cursor,
+            GENRE_FIELDS,
+        )
+        return [Genre(**genre) for genre in genres_list], next_cursor
 
+    async def _get_list_from_elastic(
+        self, page_number: int, page_size: int
+    ) -> list[Genre] | None:
         offset = (page_number - 1) * page_size
 
         genres_list = await self.search_engine.search(
@@ -53,16 +90,13 @@ class GenreService:
             query={"match_all": {}},
             from_=offset,
             size=page_size,
+            source=GENRE_FIELDS,
         )
 
         if not genres_list:
             return None
 
-        genres = [Genre(**genre) for genre in genres_list]
-
-        await self.cache_engine.put_by_key(genres, settings.genre_cache_expire_in_seconds, *cache_key_args)
-
-        return genres
+        return [Genre(**genre) for genre in genres_list]
 
 
 @lru_cache()
@@ -71,10 +105,14 @@ def get_genre_service(
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> GenreService:
 
-    redis_cache_engine = RedisCacheEngine(redis)
-    cache_engine = BaseCache(redis_cache_engine)
+    cache_engine = BaseCache(
+        get_cache_engine(redis),
+        normalized=settings.cache_normalized,
+        negative_expiration=settings.negative_cache_expire_in_seconds,
+        hot_keys=get_hot_key_tracker(redis),
+        adaptive_ttl=get_adaptive_ttl(),
+    )
 
-    elastic_search_engine = ElasticAsyncSearchEngine(elastic)
-    search_engine = BaseSearch(search_engine=elastic_search_engine)
+    search_engine = get_search(elastic)
 
     return GenreService(cache_engine, search_engine)
@@ -0,0 +1,222 @@
+"""Detection of the hottest cache keys.
+
+Every worker samples its key accesses into a count-min sketch and keeps the
+top-K keys in a heap. Periodically the counts are merged into a per-window
+Redis sorted set shared by all workers, and keys accessed at least
+``threshold`` times over the last two windows are reported as hot.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import logging
+import math
+import random
+import time
+from array import array
+from functools import lru_cache
+from typing import Protocol
+
+from core.config import settings
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+HOT_KEYS_KEY = "cache:hot_keys:{window}"
+
+
+class CountMinSketch:
+    """Approximate per-key counters in fixed memory, never underestimating."""
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count the key and return its new estimate."""
+        estimate = math.inf
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            estimate = min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def halve(self) -> None:
+        """Age all counters, so old popularity fades out."""
+        self.rows = [array("I", (count >> 1 for count in row)) for row in self.rows]
+
+    def clear(self) -> None:
+        self.rows = [array("I", bytes(4 * self.width)) for _ in range(self.depth)]
+
+
+class HotKeyListener(Protocol):
+    async def promote_hot_keys(self, keys: list[str]) -> None:
+        ...
+
+
+class HotKeyTracker:
+    def __init__(
+        self,
+        redis: Redis,
+        sample_rate: float = 0.1,
+        top_k: int = 100,
+        threshold: int = 50,
+        interval: int = 10,
+        sketch_width: int = 4096,
+    ):
+        self.redis = redis
+        self.sample_rate = sample_rate
+        self.top_k = top_k
+        self.threshold = threshold
+        self.interval = interval
+        self.sketch = CountMinSketch(sketch_width)
+        # Counts of the previous interval, kept to estimate access rates.
+        self._previous = CountMinSketch(sketch_width)
+        self._window_started = time.monotonic()
+        # Estimates of the local top-K keys and a min-heap over them, which
+        # may hold outdated counts that are skipped when popped.
+        self._top: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+        self.hot: list[str] = []
+        self._listeners: list[HotKeyListener] = []
+        self._task: asyncio.Task | None = None
+
+    def register(self, listener: HotKeyListener) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def record(self, key: str) -> bool:
+        """Sample an access, return whether the key is in the local top-K."""
+        if random.random() >= self.sample_rate:
+            return key in self._top
+
+        estimate = self.sketch.add(key)
+        if key in self._top or len(self._top) < self.top_k:
+            self._push(key, estimate)
+            return True
+
+        min_count, min_key = self._peek_min()
+        if estimate <= min_count:
+            return False
+        del self._top[min_key]
+        heapq.heappop(self._heap)
+        self._push(key, estimate)
+        return True
+
+    def rate(self, key: str) -> float:
+        """Estimated accesses per second of the key in this worker."""
+        count = self.sketch.estimate(key) + self._previous.estimate(key)
+        elapsed = time.monotonic() - self._window_started + self.interval
+        return count / self.sample_rate / elapsed
+
+    def is_tracked(self, key: str) -> bool:
+        return key in self._top or key in self.hot
+
+    def _push(self, key: str, estimate: int) -> None:
+        self._top[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.top_k:
+            self._heap = [(count, key) for key, count in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_min(self) -> tuple[int, str]:
+        while self._heap[0][0] != self._top.get(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def local_top(self) -> list[tuple[str, int]]:
+        """Local top-K keys with their estimated number of accesses."""
+        return sorted(
+            (
+                (key, round(count / self.sample_rate))
+                for key, count in self._top.items()
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def _window(self) -> int:
+        return int(time.time() // self.interval)
+
+    async def merge(self) -> None:
+        """Add this window's counts to Redis and reload the hot keys."""
+        top, window = self.local_top(), self._window()
+        self._previous, self.sketch = self.sketch, self._previous
+        self.sketch.clear()
+        self._window_started = time.monotonic()
+        self._top, self._heap = {}, []
+
+        if top:
+            key = HOT_KEYS_KEY.format(window=window)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for cache_key, count in top:
+                    pipe.zincrby(key, count, cache_key)
+                pipe.expire(key, 3 * self.interval)
+                await pipe.execute()
+
+        self.hot = [
+            key for key, score in await self.global_top() if score >= self.threshold
+        ]
+
+    async def global_top(self) -> list[tuple[str, float]]:
+        """Top-K keys of all workers over the current and previous window."""
+        window = self._window()
+        scores = await self.redis.zunion(
+            [
+                HOT_KEYS_KEY.format(window=window),
+                HOT_KEYS_KEY.format(window=window - 1),
+            ],
+            withscores=True,
+        )
+        scores = [
+            (key.decode() if isinstance(key, bytes) else key, score)
+            for key, score in scores
+        ]
+        return sorted(scores, key=lambda item: -item[1])[: self.top_k]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.merge()
+                for listener in self._listeners:
+                    await listener.promote_hot_keys(self.hot)
+            except Exception as e:
+                logger.error(f"Error updating hot keys: {e}")
+
+
+@lru_cache()
+def get_hot_key_tracker(redis: Redis) -> HotKeyTracker | None:
+    """Hot key tracker shared by all services of the worker, if enabled."""
+    if not settings.hot_keys_enabled:
+        return None
+    if not settings.local_cache_enabled:
+        logger.warning(
+            "Hot keys are refreshed but not pinned: LOCAL_CACHE_ENABLED is off"
+        )
+    return HotKeyTracker(
+        redis,
+        sample_rate=settings.hot_keys_sample_rate,
+        top_k=settings.hot_keys_top_k,
+        threshold=settings.hot_keys_threshold,
+        interval=settings.hot_keys_interval_in_seconds,
+    )
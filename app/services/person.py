@@ -1,5 +1,4 @@
 import hashlib
-import json
 import logging
 from functools import lru_cache
 from uuid import UUID
@@ -12,46 +11,71 @@ from fastapi import Depends
 from models.film import Film
 from models.person import Person, PersonFilm
 from redis.asyncio import Redis
-from services.cache import BaseCache, RedisCacheEngine
-from services.search import BaseSearch, ElasticAsyncSearchEngine
+from services import bloom
+from services.cache import BaseCache, get_adaptive_ttl, get_cache_engine
+from services.film import FILM_FIELDS
+from services.hotkeys import get_hot_key_tracker
+from services.search import BaseSearch, get_search
 
 logger = logging.getLogger(__name__)
 
+# Fields of the person documents the API reads.
+PERSON_FIELDS = ["id", "full_name"]
+# Fields of the film documents needed to tell the roles of a person.
+PERSON_ROLE_FIELDS = ["id", "directors.id", "actors.id", "writers.id"]
+
 
 class PersonService:
     def __init__(self, cache_engine: BaseCache, search_engine: BaseSearch):
         self.search_engine = search_engine
         self.cache_engine = cache_engine
 
-    async def _get_person_films(self, person_id: UUID):
-        film_list = await self.search_engine.search(
-            index=settings.movies_index,
-            query={
-                "bool": {
-                    "should": [
-                        {
-                            "nested": {
-                                "path": "directors",
-                                "query": {"term": {"directors.id": person_id}},
-                            },
+    @staticmethod
+    def _get_person_films_query(person_id: UUID) -> dict:
+        return {
+            "bool": {
+                "should": [
+                    {
+                        "nested": {
+                            "path": "directors",
+                            "query": {"term": {"directors.id": person_id}},
                         },
-                        {
-                            "nested": {
-                                "path": "actors",
-                                "query": {"term": {"actors.id": person_id}},
-                            },
+                    },
+                    {
+                        "nested": {
+                            "path": "actors",
+                            "query": {"term": {"actors.id": person_id}},
                         },
-                        {
-                            "nested": {
-                                "path": "writers",
-                                "query": {"term": {"writers.id": person_id}},
-                            }
-                        },
-                    ]
-                }
-            },
+                    },
+                    {
+                        "nested": {
+                            "path": "writers",
+                            "query": {"term": {"writers.id": person_id}},
+                        }
+                    },
+                ]
+            }
+        }
+
+    async def _get_person_films(self, person_id: UUID):
+        return (await self._get_persons_films([person_id]))[0]
+
+    async def _get_persons_films(
+        self, person_ids: list[UUID]
+    ) -> list[list[PersonFilm]]:
+        """Filmographies of the persons, searched for in one round trip."""
+        film_lists = await self.search_engine.msearch(
+            settings.movies_index,
+            [self._get_person_films_query(person_id) for person_id in person_ids],
+            source=PERSON_ROLE_FIELDS,
         )
+        return [
+            self._get_person_roles(person_id, film_list)
+            for person_id, film_list in zip(person_ids, film_lists)
+        ]
 
+    @staticmethod
+    def _get_person_roles(person_id: UUID, film_list) -> list[PersonFilm]:
         # Check if film_list is a dict and has 'hits'
         if isinstance(film_list, dict) and "hits" in film_list:
             film_hits = film_list["hits"]["hits"]
@@ -62,9 +86,9 @@ class PersonService:
 
         person_films = []
         for film in film_hits:
-            # Safely access '_source' with a fallback to an empty dict
-            source = film.get("_source", {})
-            
+            # Search engine returns sources, raw hits keep them in '_source'
+            source = film.get("_source", film)
+
             # Ensure 'id' and roles lists are present
             film_id = source.get("id")
             if film_id is None:
@@ -73,9 +97,12 @@ class PersonService:
             person_film = PersonFilm(id=film_id, roles=[])
 
             # Process roles with default to empty list
-            for role_type in ['directors', 'actors', 'writers']:
+            for role_type in ["directors", "actors", "writers"]:
                 for person in source.get(role_type, []):
-                    if person["id"] == person_id and role_type[:-1] not in person_film.roles:
+                    if (
+                        person["id"] == str(person_id)
+                        and role_type[:-1] not in person_film.roles
+                    ):
                         person_film.roles.append(role_type[:-1])  # Add role without 's'
 
             person_films.append(person_film)
@@ -83,59 +110,45 @@ class PersonService:
         return person_films
 
     async def get_by_id(self, person_id: UUID) -> Person | None:
-        person = await self.cache_engine.get_by_id("person", person_id, Person)
+        if not bloom.might_exist(settings.persons_index, person_id):
+            logger.debug(f"Person {person_id} is not in the ID filter")
+            return None
 
-        if not person:
-            person_data = await self.search_engine.get_by_id(
-                settings.persons_index, person_id
-            )
+        person = await self.cache_engine.get_or_load_by_id(
+            "person",
+            person_id,
+            Person,
+            loader=lambda: self._get_person_from_elastic(person_id),
+            expiration=settings.person_cache_expire_in_seconds,
+            soft_expiration=settings.person_cache_soft_expire_in_seconds,
+            tags=self._get_person_tags,
+        )
 
-            if not person_data:
-                return None
+        logger.info(f"Retrieved person: {person}")
+        return person
 
-            films = await self._get_person_films(person_id)
+    async def _get_person_from_elastic(self, person_id: UUID) -> Person | None:
+        person_data = await self.search_engine.get_by_id(
+            settings.persons_index, person_id, PERSON_FIELDS
+        )
 
-            person_data["films"] = (
-                [PersonFilm(**film) for film in films] if films else []
-            )
+        if not person_data:
+            return None
 
-            person = Person(**person_data)
+        person_data["films"] = await self._get_person_films(person_id)
 
-            await self.cache_engine.put_by_id(
-                "person", person, settings.person_cache_expire_in_seconds
-            )
+        return Person(**person_data)
 
-        logger.info(f"Retrieved person: {person}")
-        return person
+    @staticmethod
+    def _get_person_tags(person: Person) -> list[str]:
+        return [f"person:{person.id}"] + [f"film:{film.id}" for film in person.films]
 
     async def get_person_film_list(self, person_id):
         try:
             film_list = await self.search_engine.search(
                 index=settings.movies_index,
-                query={
-                    "bool": {
-                        "should": [
-                            {
-                                "nested": {
-                                    "path": "directors",
-                                    "query": {"term": {"directors.id": person_id}},
-                                },
-                            },
-                            {
-                                "nested": {
-                                    "path": "actors",
-                                    "query": {"term": {"actors.id": person_id}},
-                                },
-                            },
-                            {
-                                "nested": {
-                                    "path": "writers",
-                                    "query": {"term": {"writers.id": person_id}},
-                                }
-                            },
-                        ]
-                    }
-                },
+                query=self._get_person_films_query(person_id),
+                source=FILM_FIELDS,
             )
         except NotFoundError:
             return None
@@ -152,12 +165,25 @@ class PersonService:
         return []
 
     async def get_search_list(self, query, page_number, page_size):
-        cache_key_args = ("persons_list", page_size, page_number)
-        cached_data = await self.cache_engine.get_by_key(*cache_key_args, Object=Person)
-
-        if cached_data:
-            return [Person.parse_raw(person) for person in json.loads(cached_data)]
+        query_hash = hashlib.md5(query.encode()).hexdigest()
+        return await self.cache_engine.get_or_load_by_key(
+            "persons_list",
+            page_size,
+            page_number,
+            query_hash,
+            Object=Person,
+            loader=lambda: self._get_search_list_from_elastic(
+                query, page_number, page_size
+            ),
+            expiration=settings.person_cache_expire_in_seconds,
+            soft_expiration=settings.person_cache_soft_expire_in_seconds,
+            entity_name="person",
+            tags=lambda persons: [
+                tag for person in persons for tag in self._get_person_tags(person)
+            ],
+        )
 
+    async def _get_search_list_from_elastic(self, query, page_number, page_size):
         offset = (page_number - 1) * page_size
         try:
             persons_list = await self.search_engine.search(
@@ -165,6 +191,7 @@ class PersonService:
                 from_=offset,
                 size=page_size,
                 query={"match": {"full_name": query}},
+                source=PERSON_FIELDS,
             )
         except NotFoundError:
             logger.error(f"Persons not found for query: {query}")
@@ -176,36 +203,71 @@ class PersonService:
             if "hits" in persons_list and isinstance(
                 persons_list["hits"]["hits"], list
             ):
-                for get_person in persons_list["hits"]["hits"]:
-                    get_person["_source"]["films"] = await self._get_person_films(
-                        get_person["_source"]["id"]
-                    )
-                persons = [
+                hits = persons_list["hits"]["hits"]
+                films = await self._get_persons_films(
+                    [get_person["_source"]["id"] for get_person in hits]
+                )
+                for get_person, person_films in zip(hits, films):
+                    get_person["_source"]["films"] = person_films
+                return [
                     Person(**get_person["_source"])
                     for get_person in persons_list["hits"]["hits"]
                 ]
-                await self.cache_engine.put_by_key(
-                    json.dumps([person.json() for person in persons]),
-                    settings.person_cache_expire_in_seconds,
-                    *cache_key_args,
-                )
-                return persons
             else:
                 logger.error("Unexpected format for 'hits': expected a list.")
                 return []
         elif isinstance(persons_list, list):
-            persons = [
-                Person(
-                    id=person["id"],
-                    full_name=person["full_name"],
-                    films=person.get("films", []),
-                )
-                for person in persons_list
-            ]
-            return persons
+            return await self._get_persons_with_films(persons_list)
 
         return []
 
+    async def get_search_list_page(self, query, page_size, cursor):
+        """Persons at an opaque cursor and the cursor of the next page."""
+        persons_list, next_cursor = await self.search_engine.search_page(
+            settings.persons_index,
+            {"match": {"full_name": query}},
+            page_size,
+            # Ties in relevance are broken by the unique id.
+            [{"_score": {"order": "desc"}}, {"id": {"order": "asc"}}],
+            cursor,
+            PERSON_FIELDS,
+        )
+        return await self._get_persons_with_films(persons_list), next_cursor
+
+    async def _get_persons_with_films(self, persons_list: list[dict]) -> list[Person]:
+        # Reuse cached person details, which already carry filmographies,
+        # and fetch filmographies only for the rest of the page.
+        cached_persons = await self.cache_engine.get_many_by_id(
+            "person", [person["id"] for person in persons_list], Person
+        )
+
+        missing = [
+            person_data
+            for person_data, person in zip(persons_list, cached_persons)
+            if person is None
+        ]
+        films = await self._get_persons_films(
+            [person_data["id"] for person_data in missing]
+        )
+        loaded_persons = []
+        for person_data, person_films in zip(missing, films):
+            person_data["films"] = person_films
+            loaded_persons.append(Person(**person_data))
+
+        loaded = iter(loaded_persons)
+        persons = [
+            next(loaded) if person is None else person for person in cached_persons
+        ]
+
+        await self.cache_engine.put_many_by_id(
+            "person",
+            loaded_persons,
+            settings.person_cache_expire_in_seconds,
+            settings.person_cache_soft_expire_in_seconds,
+            tags=self._get_person_tags,
+        )
+        return persons
+
 
 @lru_cache()
 def get_person_service(
@@ -213,10 +275,14 @@ def get_person_service(
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> PersonService:
 
-    redis_cache_engine = RedisCacheEngine(redis)
-    cache_engine = BaseCache(redis_cache_engine)
+    cache_engine = BaseCache(
+        get_cache_engine(redis),
+        normalized=settings.cache_normalized,
+        negative_expiration=settings.negative_cache_expire_in_seconds,
+        hot_keys=get_hot_key_tracker(redis),
+        adaptive_ttl=get_adaptive_ttl(),
+    )
 
-    elastic_search_engine = ElasticAsyncSearchEngine(elastic)
-    search_engine = BaseSearch(search_engine=elastic_search_engine)
+    search_engine = get_search(elastic)
 
     return PersonService(cache_engine, search_engine)
@@ -1,47 +1,181 @@
+import asyncio
+import base64
 import logging
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
-from elasticsearch import AsyncElasticsearch, NotFoundError
+import orjson
+from core.config import settings
+from elasticsearch import AsyncElasticsearch, BadRequestError, NotFoundError
 
 logger = logging.getLogger(__name__)
 
+# Index and source projection the IDs of a get_by_id batch are fetched with.
+BatchKey = tuple[str, tuple[str, ...] | None]
+
+
+@dataclass
+class SearchPage:
+    """Documents of a search_after page and where the next one starts.
+
+    ``search_after`` holds the sort values of the last hit, None once the
+    last page is reached. ``pit_id`` is the point in time the pages are
+    read from, if any.
+    """
+
+    docs: list[Any]
+    search_after: list[Any] | None = None
+    pit_id: str | None = None
+
+
+def encode_cursor(page: SearchPage, index: str, sort: list[dict]) -> str | None:
+    """Opaque token of the page following ``page``, None after the last one.
+
+    The cursor holds the index and sort it was made for, so it cannot be
+    replayed against another listing.
+    """
+    if page.search_after is None:
+        return None
+    data = orjson.dumps(
+        {"index": index, "sort": sort, "after": page.search_after, "pit": page.pit_id}
+    )
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, index: str, sort: list[dict]
+) -> tuple[list[Any] | None, str | None]:
+    """Sort values and point in time of a cursor, an empty one is the start.
+
+    Raises ValueError unless the cursor was made for ``index`` and ``sort``
+    and holds a sort value for every sort field.
+    """
+    if not cursor:
+        return None, None
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        after, pit_id = data["after"], data["pit"]
+        valid = (
+            data["index"] == index
+            and data["sort"] == sort
+            and isinstance(after, list)
+            # Searches in a point in time sort by an implicit _shard_doc last.
+            and len(after) == len(sort) + (pit_id is not None)
+            and all(isinstance(value, (str, int, float)) for value in after)
+            and (pit_id is None or isinstance(pit_id, str))
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor {cursor}") from e
+    if not valid:
+        raise ValueError(f"Invalid cursor {cursor}")
+    return after, pit_id
 
-class AsyncSearchEngine(ABC):
 
+class AsyncSearchEngine(ABC):
     @abstractmethod
-    async def get_by_id(self, index: str, _id: str) -> Any | None:
+    async def get_by_id(
+        self, index: str, _id: str, source: list[str] | None = None
+    ) -> Any | None:
         pass
 
     @abstractmethod
-    async def get_by_ids(self, index: str, ids: list[str]) -> list[Any] | None:
+    async def get_by_ids(
+        self, index: str, ids: list[str], source: list[str] | None = None
+    ) -> list[Any | None]:
+        """Documents in the order of ``ids``, None for the missing ones."""
         pass
 
     @abstractmethod
     async def search(
-        self, index: str, query: dict, from_: int, size: int, sort: list[dict] = None
+        self,
+        index: str,
+        query: dict,
+        from_: int,
+        size: int,
+        sort: list[dict] = None,
+        source: list[str] | None = None,
     ) -> list[Any]:
+        """Sources of the hits, only with the ``source`` fields if given."""
+        pass
+
+    @abstractmethod
+    async def msearch(
+        self,
+        index: str,
+        queries: list[dict],
+        size: int | None = None,
+        source: list[str] | None = None,
+    ) -> list[list[Any]]:
+        """Sources of the hits of every query, all sent in one request."""
+        pass
+
+    @abstractmethod
+    async def search_page(
+        self,
+        index: str,
+        query: dict,
+        size: int,
+        sort: list[dict],
+        search_after: list[Any] | None = None,
+        pit_id: str | None = None,
+        keep_alive: str | None = None,
+        source: list[str] | None = None,
+    ) -> SearchPage:
+        """Page of hits following ``search_after`` in ``sort`` order.
+
+        ``sort`` must end with a unique field, so no hit is skipped or
+        repeated between pages. With ``keep_alive`` the pages are read from
+        a point in time opened on the first page and closed after the last.
+        """
         pass
 
 
 class ElasticAsyncSearchEngine(AsyncSearchEngine):
-    def __init__(self, elastic: AsyncElasticsearch):
+    def __init__(self, elastic: AsyncElasticsearch, mget_chunk_size: int = 1000):
         self.elastic = elastic
+        self.mget_chunk_size = mget_chunk_size
 
-    async def get_by_id(self, index: str, _id: str) -> Any | None:
+    async def get_by_id(
+        self, index: str, _id: str, source: list[str] | None = None
+    ) -> Any | None:
         try:
-            doc = await self.elastic.get(index=index, id=_id)
+            doc = await self.elastic.get(index=index, id=_id, source_includes=source)
             return doc["_source"]
         except NotFoundError:
             return None
 
-    async def get_by_ids(self, index: str, ids: list[str]) -> list[Any] | None:
-        docs = []
-        for _id in ids:
-            doc = await self.get_by_id(index, _id)
-            if doc:
-                docs.append(doc)
-        return docs
+    async def get_by_ids(
+        self, index: str, ids: list[str], source: list[str] | None = None
+    ) -> list[Any | None]:
+        ids = [str(_id) for _id in ids]
+        if not ids:
+            return []
+
+        # Large ID sets are split into several _mget requests sent at once.
+        chunks = await asyncio.gather(
+            *[
+                self._mget(index, ids[start : start + self.mget_chunk_size], source)
+                for start in range(0, len(ids), self.mget_chunk_size)
+            ]
+        )
+        return [doc for chunk in chunks for doc in chunk]
+
+    async def _mget(
+        self, index: str, ids: list[str], source: list[str] | None
+    ) -> list[Any | None]:
+        try:
+            response = await self.elastic.mget(
+                index=index,
+                ids=ids,
+                source=True if source is None else source,
+            )
+        except NotFoundError:
+            return [None] * len(ids)
+        return [
+            doc["_source"] if doc.get("found") else None for doc in response["docs"]
+        ]
 
     async def search(
         self,
@@ -50,26 +184,213 @@ class ElasticAsyncSearchEngine(AsyncSearchEngine):
         from_: int = None,
         size: int = None,
         sort: list[dict] = None,
+        source: list[str] | None = None,
     ) -> list[Any]:
         try:
             results = await self.elastic.search(
-                index=index, from_=from_, size=size, query=query, sort=sort
+                index=index,
+                from_=from_,
+                size=size,
+                query=query,
+                sort=sort,
+                source_includes=source,
             )
             return [hit["_source"] for hit in results["hits"]["hits"]]
         except NotFoundError:
             return []
 
+    async def msearch(
+        self,
+        index: str,
+        queries: list[dict],
+        size: int | None = None,
+        source: list[str] | None = None,
+    ) -> list[list[Any]]:
+        if not queries:
+            return []
+
+        searches = []
+        for query in queries:
+            body = {"query": query}
+            if size is not None:
+                body["size"] = size
+            if source is not None:
+                body["_source"] = source
+            searches += [{"index": index}, body]
+
+        try:
+            results = await self.elastic.msearch(searches=searches)
+        except NotFoundError:
+            return [[] for _ in queries]
+
+        docs = []
+        for response in results["responses"]:
+            if "error" in response:
+                # A missing index is no results, like in search.
+                if response.get("status") == 404:
+                    docs.append([])
+                    continue
+                raise RuntimeError(f"Search failed: {response['error']}")
+            docs.append([hit["_source"] for hit in response["hits"]["hits"]])
+        return docs
+
+    async def search_page(
+        self,
+        index: str,
+        query: dict,
+        size: int,
+        sort: list[dict],
+        search_after: list[Any] | None = None,
+        pit_id: str | None = None,
+        keep_alive: str | None = None,
+        source: list[str] | None = None,
+    ) -> SearchPage:
+        if keep_alive and pit_id is None:
+            try:
+                response = await self.elastic.open_point_in_time(
+                    index=index, keep_alive=keep_alive
+                )
+            except NotFoundError:
+                return SearchPage([])
+            pit_id = response["id"]
+
+        try:
+            if pit_id:
+                results = await self.elastic.search(
+                    pit={"id": pit_id, "keep_alive": keep_alive or "1m"},
+                    query=query,
+                    size=size,
+                    sort=sort,
+                    search_after=search_after,
+                    source_includes=source,
+                )
+            else:
+                results = await self.elastic.search(
+                    index=index,
+                    query=query,
+                    size=size,
+                    sort=sort,
+                    search_after=search_after,
+                    source_includes=source,
+                )
+        except NotFoundError:
+            if pit_id:
+                raise ValueError("The cursor has expired")
+            return SearchPage([])
+        except BadRequestError as e:
+            # Sort values of a cursor the search engine cannot use.
+            if search_after is not None:
+                raise ValueError("Invalid cursor") from e
+            raise
+
+        hits = results["hits"]["hits"]
+        pit_id = results.get("pit_id", pit_id)
+        docs = [hit["_source"] for hit in hits]
+        if len(hits) < size:
+            if pit_id:
+                await self._close_point_in_time(pit_id)
+            return SearchPage(docs)
+        return SearchPage(docs, hits[-1]["sort"], pit_id)
+
+    async def _close_point_in_time(self, pit_id: str) -> None:
+        try:
+            await self.elastic.close_point_in_time(id=pit_id)
+        except NotFoundError:
+            pass
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
+
 
 class BaseSearch:
-    def __init__(self, search_engine: AsyncSearchEngine):
+    """Search engine front shared by the services.
+
+    With a ``batch_window`` (in seconds) ``get_by_id`` works as a batching
+    loader: the IDs of one index requested by all in-flight requests within
+    the window, or until ``batch_size`` of them are collected, are fetched
+    with a single ``get_by_ids`` per ``source`` projection and every caller
+    gets its own document.
+
+    Cursor pages are read from a point in time kept for
+    ``cursor_keep_alive`` between pages, if given.
+    """
+
+    def __init__(
+        self,
+        search_engine: AsyncSearchEngine,
+        batch_window: float = 0.0,
+        batch_size: int = 1000,
+        cursor_keep_alive: str | None = None,
+    ):
         self.search_engine = search_engine
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.cursor_keep_alive = cursor_keep_alive
+        # Futures of the IDs collected for the next fetch, per index and
+        # projection.
+        self._batches: dict[BatchKey, dict[str, asyncio.Future]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get_by_id(
+        self, index: str, obj_id: str, source: list[str] | None = None
+    ) -> Any | None:
+        if self.batch_window <= 0:
+            obj = await self.search_engine.get_by_id(index, obj_id, source)
+            return obj
+
+        obj_id = str(obj_id)
+        key = (index, None if source is None else tuple(source))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = {}
+            self._spawn(self._dispatch(key, batch))
+
+        future = batch.get(obj_id)
+        if future is None:
+            future = batch[obj_id] = asyncio.get_running_loop().create_future()
+            # Every caller may be gone by the time the fetch fails.
+            future.add_done_callback(_retrieve_exception)
+            if len(batch) >= self.batch_size:
+                del self._batches[key]
+                self._spawn(self._load(key, batch))
+
+        # A cancelled caller must not cancel the fetch for the others.
+        return await asyncio.shield(future)
+
+    def _spawn(self, coroutine: Any) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
-    async def get_by_id(self, index: str, obj_id: str) -> Any | None:
-        obj = await self.search_engine.get_by_id(index, obj_id)
-        return obj
+    async def _dispatch(self, key: BatchKey, batch: dict[str, asyncio.Future]) -> None:
+        await asyncio.sleep(self.batch_window)
+        # The batch may have been sent already when it got full.
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+            await self._load(key, batch)
 
-    async def get_by_ids(self, index: str, obj_ids: list[str]) -> list[Any]:
-        objs = await self.search_engine.get_by_ids(index, obj_ids)
+    async def _load(self, key: BatchKey, batch: dict[str, asyncio.Future]) -> None:
+        index, source = key
+        try:
+            docs = await self.search_engine.get_by_ids(
+                index, list(batch), None if source is None else list(source)
+            )
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, doc in zip(batch.values(), docs):
+            if not future.done():
+                future.set_result(doc)
+
+    async def get_by_ids(
+        self, index: str, obj_ids: list[str], source: list[str] | None = None
+    ) -> list[Any | None]:
+        objs = await self.search_engine.get_by_ids(index, obj_ids, source)
         return objs
 
     async def search(
@@ -79,6 +400,60 @@ class BaseSearch:
         from_: int = None,
         size: int = None,
         sort: list[dict] = None,
+        source: list[str] | None = None,
     ) -> list[Any]:
-        results = await self.search_engine.search(index, query, from_, size, sort)
+        results = await self.search_engine.search(
+            index, query, from_, size, sort, source
+        )
         return results
+
+    async def msearch(
+        self,
+        index: str,
+        queries: list[dict],
+        size: int | None = None,
+        source: list[str] | None = None,
+    ) -> list[list[Any]]:
+        results = await self.search_engine.msearch(index, queries, size, source)
+        return results
+
+    async def search_page(
+        self,
+        index: str,
+        query: dict,
+        size: int,
+        sort: list[dict],
+        cursor: str,
+        source: list[str] | None = None,
+    ) -> tuple[list[Any], str | None]:
+        """Page at an opaque cursor and the cursor of the next page.
+
+        Raises ValueError for invalid or expired cursors.
+        """
+        search_after, pit_id = decode_cursor(cursor, index, sort)
+        page = await self.search_engine.search_page(
+            index,
+            query,
+            size,
+            sort,
+            search_after,
+            pit_id,
+            self.cursor_keep_alive,
+            source,
+        )
+        return page.docs, encode_cursor(page, index, sort)
+
+
+@lru_cache()
+def get_search(elastic: AsyncElasticsearch) -> BaseSearch:
+    """Search front shared by all services of the worker, so they batch together."""
+    return BaseSearch(
+        ElasticAsyncSearchEngine(elastic, mget_chunk_size=settings.search_batch_size),
+        batch_window=settings.search_batch_window_in_milliseconds / 1000,
+        batch_size=settings.search_batch_size,
+        cursor_keep_alive=(
+            settings.search_cursor_keep_alive
+            if settings.search_cursor_pit_enabled
+            else None
+        ),
+    )
@@ -0,0 +1,102 @@
+"""Cache warmup run before a worker starts serving requests.
+
+It requests the pages and films most clients ask for first through the
+regular services, so they are cached under the same keys the API uses.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable
+
+from core.config import settings
+from services.film import FilmService
+from services.genre import GenreService
+
+logger = logging.getLogger(__name__)
+
+# Sort orders the films endpoint accepts, as the API passes them.
+FILM_SORTS = [[], ["imdb_rating"], ["-imdb_rating"]]
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        film_service: FilmService,
+        genre_service: GenreService,
+        film_pages: int = 5,
+        page_size: int = 50,
+        film_details: int = 100,
+        concurrency: int = 10,
+    ):
+        self.film_service = film_service
+        self.genre_service = genre_service
+        self.film_pages = film_pages
+        self.page_size = page_size
+        self.film_details = film_details
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _call(self, request: Awaitable[Any]) -> Any | None:
+        async with self._semaphore:
+            try:
+                return await request
+            except Exception as e:
+                logger.error(f"Cache warmup request failed: {e}")
+                return None
+
+    async def warm_up(self) -> None:
+        *films_by_sort, _ = await asyncio.gather(
+            *[self._warm_up_films(sort) for sort in FILM_SORTS],
+            self._warm_up_genres(),
+        )
+
+        # Details of the top-rated films, taken from the pages just loaded.
+        top_rated = films_by_sort[FILM_SORTS.index(["-imdb_rating"])]
+        await asyncio.gather(
+            *[
+                self._call(self.film_service.get_by_id(film.id))
+                for film in top_rated[: self.film_details]
+            ]
+        )
+        logger.info(
+            f"Cache warmed up with {self.film_pages} film pages per sort "
+            f"and {min(len(top_rated), self.film_details)} films"
+        )
+
+    async def _warm_up_films(self, sort: list[str]) -> list[Any]:
+        pages = await asyncio.gather(
+            *[
+                self._call(
+                    self.film_service.get_list(sort, None, self.page_size, page_number)
+                )
+                for page_number in range(1, self.film_pages + 1)
+            ]
+        )
+        return [film for page in pages for film in page or []]
+
+    async def _warm_up_genres(self) -> None:
+        page_number = 1
+        while True:
+            genres = await self._call(
+                self.genre_service.get_list(page_number, self.page_size)
+            )
+            if not genres or len(genres) < self.page_size:
+                return
+            page_number += 1
+
+
+async def warm_up_cache(film_service: FilmService, genre_service: GenreService) -> None:
+    """Warm the cache up within the configured time budget."""
+    warmer = CacheWarmer(
+        film_service,
+        genre_service,
+        film_pages=settings.warmup_film_pages,
+        page_size=settings.warmup_page_size,
+        film_details=settings.warmup_film_details,
+        concurrency=settings.warmup_concurrency,
+    )
+    try:
+        await asyncio.wait_for(
+            warmer.warm_up(), timeout=settings.warmup_timeout_in_seconds
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Cache warmup did not finish in time, continuing without it")
@@ -1,30 +1,38 @@
 import hashlib
-import json
-import pytest
 import random
 
+import pytest
+
 from tests.functional.settings import settings
 from tests.functional.testdata.genres import GENRES_DATA
 from tests.functional.testdata.persons import PERSONS_DATA
-
+from tests.functional.utils.helpers import decode_cache_value
 from tests.functional.utils.logger import logger
 
 pytestmark = pytest.mark.asyncio
 
 
-async def test_genres_search_cache(session, es_client, redis_client, genres_index_create, genres_data_load):
+async def test_genres_search_cache(
+    session, es_client, redis_client, genres_index_create, genres_data_load
+):
     url_template = "{service_url}/api/v1/genres/"
     url = url_template.format(service_url=settings.app_dsn)
-    cache_key = "genres_list:50:1"
+    cache_key = "v1:genres_list:g0:50:1"
 
     async with session.get(url) as response:
 
         cached_data = await redis_client.get(cache_key)
-        assert len(json.loads(cached_data)) == len(GENRES_DATA)
+        assert len(decode_cache_value(cached_data)) == len(GENRES_DATA)
 
 
 async def test_get_person_by_id_cache(
-    session, redis_client, es_client, movies_index_create, movies_data_load, persons_index_create, persons_data_load
+    session,
+    redis_client,
+    es_client,
+    movies_index_create,
+    movies_data_load,
+    persons_index_create,
+    persons_data_load,
 ):
     url_template = "{service_url}/api/v1/persons/{id}/"
     id = PERSONS_DATA[random.randrange(len(PERSONS_DATA))]["id"]
@@ -32,9 +40,9 @@ async def test_get_person_by_id_cache(
 
     async with session.get(url) as response:
 
-        cached_data = await redis_client.get(f"person:{str(id)}")
+        cached_data = await redis_client.get(f"v1:person:{str(id)}")
 
-        assert json.loads(cached_data).get("id") == id
+        assert decode_cache_value(cached_data).get("id") == id
 
 
 async def test_movies_search_sort_asc_cache(
@@ -42,12 +50,13 @@ async def test_movies_search_sort_asc_cache(
 ):
     url_template = "{service_url}/api/v1/films/?sort=imdb_rating"
     url = url_template.format(service_url=settings.app_dsn)
-    cache_key = "films_list:50:1:['imdb_rating']"
+    cache_key = "v1:films_list:g0:50:1:['imdb_rating']:None"
 
     async with session.get(url) as response:
 
         cached_data = await redis_client.get(cache_key)
 
-        assert json.loads(cached_data)[0][7:43] == "7429fb65-1436-4035-832d-3ef8fb8851fa"
-
-
+        assert (
+            decode_cache_value(cached_data)[0]["id"]
+            == "7429fb65-1436-4035-832d-3ef8fb8851fa"
+        )
@@ -8,6 +8,7 @@ from tests.functional.testdata.genres import GENRES_DATA
 
 pytestmark = pytest.mark.asyncio
 
+
 async def test_genres_search(session, es_client, genres_index_create, genres_data_load):
     url_template = "{service_url}/api/v1/genres/"
     url = url_template.format(service_url=settings.app_dsn)
@@ -45,6 +46,7 @@ async def test_get_genre_by_not_existen_id(
 
         assert response.status == http.HTTPStatus.NOT_FOUND
 
+
 async def test_get_genre_by_invalid_id(
     session,
     es_client,
@@ -55,9 +57,10 @@ async def test_get_genre_by_invalid_id(
     url = url_template.format(service_url=settings.app_dsn, id=id)
 
     async with session.get(url) as response:
-        
+
         assert response.status == http.HTTPStatus.UNPROCESSABLE_ENTITY
 
+
 async def test_get_genre_by_id(
     session, es_client, genres_index_create, genres_data_load
 ):
@@ -68,3 +71,33 @@ async def test_get_genre_by_id(
     async with session.get(url) as response:
 
         assert response.status == http.HTTPStatus.OK
+
+
+async def test_genres_cursor_pagination(
+    session, es_client, genres_index_create, genres_data_load
+):
+    url_template = "{service_url}/api/v1/genres/"
+    url = url_template.format(service_url=settings.app_dsn)
+
+    ids, cursor = [], ""
+    while cursor is not None:
+        async with session.get(
+            url, params={"page_size": 3, "cursor": cursor}
+        ) as response:
+
+            body = await response.json()
+
+            assert response.status == http.HTTPStatus.OK
+            ids.extend(genre["uuid"] for genre in body)
+            cursor = response.headers.get("X-Next-Cursor")
+
+    assert sorted(ids) == sorted(genre["id"] for genre in GENRES_DATA)
+
+
+async def test_genres_invalid_cursor(session, es_client, genres_index_create):
+    url_template = "{service_url}/api/v1/genres/"
+    url = url_template.format(service_url=settings.app_dsn)
+
+    async with session.get(url, params={"cursor": "not_a_cursor"}) as response:
+
+        assert response.status == http.HTTPStatus.BAD_REQUEST
@@ -0,0 +1,17 @@
+import json
+import struct
+
+import zstandard
+
+# Header written by RedisCacheEngine in app/services/cache.py.
+CACHE_HEADER = struct.Struct("!BBBddf")
+ZSTD_FLAG = 0b01
+
+
+def decode_cache_value(value: bytes):
+    """Decode a cached value written with the default orjson codec."""
+    flags = CACHE_HEADER.unpack_from(value)[2]
+    payload = value[CACHE_HEADER.size :]
+    if flags & ZSTD_FLAG:
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return json.loads(payload)
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../..", "app"))
+sys.path.insert(0, APP_DIR)
+
+# The app settings require these, the unit tests talk to no real service.
+for name, value in {
+    "PROJECT_NAME": "movies",
+    "ELASTIC_HOST": "elastic",
+    "ELASTIC_PORT": "9200",
+    "REDIS_HOST": "redis",
+    "REDIS_PORT": "6379",
+    "FILM_CACHE_EXPIRE_IN_SECONDS": "300",
+    "GENRE_CACHE_EXPIRE_IN_SECONDS": "300",
+    "PERSON_CACHE_EXPIRE_IN_SECONDS": "300",
+    "MOVIES_INDEX": "movies_test",
+    "GENRES_INDEX": "genres_test",
+    "PERSONS_INDEX": "persons_test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis  # noqa: E402
+
+
+@pytest.fixture
+def redis_server():
+    """One fake Redis server, shared by the clients of several "workers"."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_redis(redis_server):
+    return lambda: fakeredis.FakeAsyncRedis(server=redis_server)
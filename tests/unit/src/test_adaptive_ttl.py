@@ -0,0 +1,25 @@
+from unittest.mock import Mock
+
+import pytest
+from core.config import settings
+from services.cache import AdaptiveTtl, BaseCache, get_adaptive_ttl
+
+
+def test_adaptive_ttl_requires_hot_keys(monkeypatch):
+    monkeypatch.setattr(settings, "cache_adaptive_ttl_enabled", True)
+    monkeypatch.setattr(settings, "hot_keys_enabled", False)
+
+    with pytest.raises(ValueError, match="HOT_KEYS_ENABLED"):
+        get_adaptive_ttl()
+
+    monkeypatch.setattr(settings, "hot_keys_enabled", True)
+    assert get_adaptive_ttl() == AdaptiveTtl(
+        settings.cache_min_expire_in_seconds,
+        settings.cache_max_expire_in_seconds,
+        settings.cache_adaptive_ttl_reference_rate,
+    )
+
+
+def test_cache_rejects_adaptive_ttl_without_tracker():
+    with pytest.raises(ValueError):
+        BaseCache(Mock(), adaptive_ttl=AdaptiveTtl(60, 3600))
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from db.redis import AutoPipelineRedis
+from redis.exceptions import ConnectionError, ResponseError
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def make_client(make_redis):
+    def make_client(window=0.0):
+        client = AutoPipelineRedis(connection_pool=make_redis().connection_pool)
+        client.window = window
+        pipelines = []
+        make_pipeline = client.pipeline
+
+        def pipeline(*args, **kwargs):
+            pipe = make_pipeline(*args, **kwargs)
+            pipelines.append(pipe)
+            return pipe
+
+        client.pipeline = pipeline
+        return client, pipelines
+
+    return make_client
+
+
+async def test_concurrent_callers_get_their_own_replies(make_client):
+    client, pipelines = make_client()
+    await asyncio.gather(*[client.set(f"key:{i}", i) for i in range(20)])
+
+    values = await asyncio.gather(*[client.get(f"key:{i}") for i in range(20)])
+
+    assert values == [str(i).encode() for i in range(20)]
+    assert len(pipelines) == 2
+
+
+async def test_errors_go_to_their_own_caller(make_client):
+    client, _ = make_client()
+    await client.set("text", "not a number")
+
+    results = await asyncio.gather(
+        client.incr("counter"),
+        client.incr("text"),
+        client.get("text"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == 1
+    assert isinstance(results[1], ResponseError)
+    assert results[2] == b"not a number"
+
+
+async def test_failed_pipeline_fails_every_caller(make_client, monkeypatch):
+    client, _ = make_client()
+
+    async def execute(self, raise_on_error=True):
+        raise ConnectionError("Connection lost")
+
+    monkeypatch.setattr(type(client.pipeline()), "execute", execute)
+
+    results = await asyncio.gather(
+        *[client.get(f"key:{i}") for i in range(3)], return_exceptions=True
+    )
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+async def test_unpipelined_commands_bypass_the_queue(make_client):
+    client, pipelines = make_client()
+    await client.xadd("stream", {"field": "value"})
+    pipelines.clear()
+
+    entries, value = await asyncio.gather(
+        client.xread({"stream": "0"}), client.get("key")
+    )
+
+    assert entries[0][1][0][1] == {b"field": b"value"}
+    assert value is None
+    # Only GET was queued, and a single command needs no pipeline.
+    assert not pipelines
+
+
+async def test_window_collects_commands_issued_later(make_client):
+    client, pipelines = make_client(window=0.05)
+
+    async def delayed_set():
+        await asyncio.sleep(0.01)
+        return await client.set("late", 1)
+
+    await asyncio.gather(client.set("early", 1), delayed_set())
+
+    assert len(pipelines) == 1
+    assert await client.mget("early", "late") == [b"1", b"1"]
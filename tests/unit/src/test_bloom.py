@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import pytest
+from services import bloom
+from services.bloom import BloomFilter, IdFilters
+
+pytestmark = pytest.mark.asyncio
+
+STREAM = "cache:events"
+INDICES = {"film": "movies_test"}
+
+
+def make_id_filters(redis):
+    id_filters = IdFilters(
+        AsyncMock(), redis, INDICES, stream=STREAM, refresh=3600, block=10
+    )
+    # Built at startup, before the new film exists.
+    id_filters._filters["movies_test"] = BloomFilter(10, 0.001)
+    return id_filters
+
+
+async def test_new_id_reaches_every_worker(make_redis):
+    # Worker A consumes the event through the group, worker B never sees it.
+    workers = [make_id_filters(make_redis()) for _ in range(2)]
+    for worker in workers:
+        worker._tasks = [asyncio.create_task(worker._follow_events())]
+    await asyncio.sleep(0.05)
+
+    film_id = str(uuid4())
+    assert not any(worker.might_exist("movies_test", film_id) for worker in workers)
+
+    etl = make_redis()
+    await etl.xadd(STREAM, {"entity": "film", "id": film_id, "op": "upsert"})
+    await etl.xgroup_create(STREAM, "movies_api", id="0")
+    await etl.xreadgroup("movies_api", "worker-a", {STREAM: ">"})
+    await asyncio.sleep(0.05)
+
+    try:
+        assert all(worker.might_exist("movies_test", film_id) for worker in workers)
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+async def test_deleted_ids_are_not_added(make_redis):
+    worker = make_id_filters(make_redis())
+    film_id = str(uuid4())
+
+    worker._add_created({"entity": "film", "id": film_id, "op": "delete"})
+    worker._add_created({"entity": "genre", "id": film_id})
+    worker._add_created({"entity": "film", "id": "not-a-uuid"})
+
+    assert not worker.might_exist("movies_test", film_id)
+
+
+async def test_ids_added_before_a_build_survive_refresh_lag(make_redis, monkeypatch):
+    async def scan(*args, **kwargs):
+        # The new document is not visible to searches yet.
+        for hit in []:
+            yield hit
+
+    monkeypatch.setattr(bloom, "async_scan", scan)
+    elastic = AsyncMock()
+    # Sized for many IDs, so the older one is not a false positive.
+    elastic.count.return_value = {"count": 1000}
+    id_filters = IdFilters(elastic, make_redis(), INDICES, stream=STREAM)
+    film_id = str(UUID(int=1))
+
+    # The event arrives before the first build starts.
+    id_filters._add_created({"entity": "film", "id": film_id})
+    await id_filters._build("movies_test")
+    assert id_filters.might_exist("movies_test", film_id)
+
+    # IDs added since the previous build began are kept, whatever the scan.
+    other_id = str(UUID(int=2))
+    id_filters._add_created({"entity": "film", "id": other_id})
+    await id_filters._build("movies_test")
+    assert id_filters.might_exist("movies_test", other_id)
+
+    # By then the scan is trusted with the older IDs.
+    assert not id_filters.might_exist("movies_test", film_id)
@@ -0,0 +1,80 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from models.genre import Genre
+from services.cache import BaseCache, RedisCacheEngine
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_loader(genre_id, calls, delay=0.1):
+    async def loader():
+        calls.append(genre_id)
+        await asyncio.sleep(delay)
+        return Genre(id=genre_id, name="Action")
+
+    return loader
+
+
+async def test_one_rebuild_across_engines(make_redis):
+    workers = [BaseCache(RedisCacheEngine(make_redis())) for _ in range(2)]
+    genre_id, calls = uuid4(), []
+
+    genres = await asyncio.gather(
+        *[
+            worker.get_or_load_by_id(
+                "genre", genre_id, Genre, make_loader(genre_id, calls), 60
+            )
+            for worker in workers
+        ]
+    )
+
+    assert calls == [genre_id]
+    assert [genre.id for genre in genres] == [genre_id, genre_id]
+
+
+async def test_lease_timeout_falls_back_to_loading(make_redis):
+    holder = RedisCacheEngine(make_redis())
+    waiter = BaseCache(RedisCacheEngine(make_redis(), lease_wait=0.1))
+    genre_id, calls = uuid4(), []
+
+    # A worker that took the lease and never filled the key.
+    key = holder._generate_cache_key("genre", genre_id)
+    _, lease = await holder.get_or_lease(key, Genre)
+    assert lease is not None
+
+    genre = await waiter.get_or_load_by_id(
+        "genre", genre_id, Genre, make_loader(genre_id, calls, delay=0), 60
+    )
+
+    assert genre.id == genre_id
+    assert calls == [genre_id]
+
+
+async def test_concurrent_waiters_start_one_lease_listener(make_redis):
+    redis = make_redis()
+    engine = RedisCacheEngine(redis, lease_wait=0.1)
+    pubsubs = []
+
+    def make_pubsub(make=redis.pubsub):
+        pubsub = make()
+        subscribe = pubsub.subscribe
+
+        async def slow_subscribe(*channels):
+            # Let the other waiters run while subscribing, as a real server would.
+            await asyncio.sleep(0.01)
+            return await subscribe(*channels)
+
+        pubsub.subscribe = slow_subscribe
+        pubsubs.append(pubsub)
+        return pubsub
+
+    redis.pubsub = make_pubsub
+
+    await asyncio.gather(
+        *[engine.wait_for_cache(f"genre:{uuid4()}", Genre) for _ in range(5)]
+    )
+
+    assert len(pubsubs) == 1
+    engine._lease_listener.cancel()
@@ -0,0 +1,48 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from models.genre import Genre
+from services.cache import NEGATIVE, BaseCache, RedisCacheEngine
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_missing_id_is_cached_as_negative(make_redis):
+    redis = make_redis()
+    engine = RedisCacheEngine(redis, ttl_jitter=0)
+    cache = BaseCache(engine, negative_expiration=1)
+    genre_id, calls = uuid4(), []
+
+    async def loader():
+        calls.append(genre_id)
+        return None
+
+    for _ in range(2):
+        assert (
+            await cache.get_or_load_by_id("genre", genre_id, Genre, loader, 60) is None
+        )
+
+    key = engine._generate_cache_key("genre", genre_id)
+    assert await engine.get_from_cache(key, Genre) is NEGATIVE
+    assert await redis.ttl(key) == 1
+    assert calls == [genre_id]
+
+    await asyncio.sleep(1.1)
+
+    assert await cache.get_or_load_by_id("genre", genre_id, Genre, loader, 60) is None
+    assert calls == [genre_id, genre_id]
+
+
+async def test_missing_id_is_not_cached_without_negative_ttl(make_redis):
+    engine = RedisCacheEngine(make_redis())
+    cache = BaseCache(engine)
+    genre_id = uuid4()
+
+    async def loader():
+        return None
+
+    await cache.get_or_load_by_id("genre", genre_id, Genre, loader, 60)
+
+    key = engine._generate_cache_key("genre", genre_id)
+    assert await engine.get_from_cache(key, Genre) is None
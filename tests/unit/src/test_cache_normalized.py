@@ -0,0 +1,85 @@
+import logging
+from uuid import uuid4
+
+import pytest
+from models.film import Film, FilmDetail
+from services.cache import BaseCache, RedisCacheEngine
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_film_detail(film: Film) -> FilmDetail:
+    return FilmDetail(
+        **film.model_dump(),
+        description="",
+        genres=[],
+        actors=[],
+        writers=[],
+        directors=[],
+    )
+
+
+async def test_page_items_do_not_shadow_details(make_redis, caplog):
+    cache = BaseCache(RedisCacheEngine(make_redis()), normalized=True)
+    films = [Film(id=uuid4(), title=f"Film {i}", imdb_rating=i) for i in range(3)]
+
+    async def load_page():
+        return films
+
+    page_loads = []
+
+    async def load_page_once():
+        page_loads.append(1)
+        return await load_page()
+
+    await cache.get_or_load_by_key(
+        "films_list",
+        1,
+        Object=Film,
+        loader=load_page,
+        expiration=60,
+        entity_name="film",
+    )
+
+    async def load_detail():
+        return make_film_detail(films[0])
+
+    with caplog.at_level(logging.INFO):
+        detail = await cache.get_or_load_by_id(
+            "film", films[0].id, FilmDetail, load_detail, 60
+        )
+        page = await cache.get_or_load_by_key(
+            "films_list",
+            1,
+            Object=Film,
+            loader=load_page_once,
+            expiration=60,
+            entity_name="film",
+        )
+
+    assert isinstance(detail, FilmDetail)
+    assert [film.id for film in page] == [film.id for film in films]
+    assert not page_loads
+    assert not [
+        record for record in caplog.records if record.levelno >= logging.WARNING
+    ]
+
+
+async def test_invalidate_by_id_drops_page_item(make_redis):
+    cache = BaseCache(RedisCacheEngine(make_redis()), normalized=True)
+    film = Film(id=uuid4(), title="Film", imdb_rating=5)
+
+    async def load_page():
+        return [film]
+
+    await cache.get_or_load_by_key(
+        "films_list",
+        1,
+        Object=Film,
+        loader=load_page,
+        expiration=60,
+        entity_name="film",
+    )
+    await cache.invalidate_by_id("film", film.id)
+
+    assert await cache.get_many_by_id("film_item", [film.id], Film) == [None]
@@ -0,0 +1,53 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from models.genre import Genre
+from services.cache import BaseCache, RedisCacheEngine
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_misses_load_once(make_redis):
+    cache = BaseCache(RedisCacheEngine(make_redis()))
+    genre_id, calls = uuid4(), []
+
+    async def loader():
+        calls.append(genre_id)
+        await asyncio.sleep(0.05)
+        return Genre(id=genre_id, name="Action")
+
+    genres = await asyncio.gather(
+        *[
+            cache.get_or_load_by_id("genre", genre_id, Genre, loader, 60)
+            for _ in range(10)
+        ]
+    )
+
+    assert calls == [genre_id]
+    assert {genre.id for genre in genres} == {genre_id}
+
+
+async def test_loader_error_reaches_every_waiter_once(make_redis):
+    cache = BaseCache(RedisCacheEngine(make_redis()))
+    genre_id = uuid4()
+
+    async def failing_loader():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("Search failed")
+
+    async def loader():
+        return Genre(id=genre_id, name="Action")
+
+    results = await asyncio.gather(
+        *[
+            cache.get_or_load_by_id("genre", genre_id, Genre, failing_loader, 60)
+            for _ in range(5)
+        ],
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # Neither the in-flight load nor the lease outlive the failure.
+    genre = await cache.get_or_load_by_id("genre", genre_id, Genre, loader, 60)
+    assert genre.id == genre_id
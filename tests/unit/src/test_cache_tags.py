@@ -0,0 +1,96 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from models.genre import Genre
+from models.person import Person
+from services import cache
+from services.cache import TAG_KEY, BaseCache, RedisCacheEngine
+from services.person import PersonService
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Unix time seen by the cache engine, moved by hand."""
+    now = [time.time()]
+    monkeypatch.setattr(
+        cache, "time", SimpleNamespace(time=lambda: now[0], monotonic=time.monotonic)
+    )
+    return now
+
+
+async def test_tag_sets_drop_expired_keys(make_redis, clock):
+    redis = make_redis()
+    engine = RedisCacheEngine(redis)
+    genre = Genre(id=uuid4(), name="Action")
+    tag_key = TAG_KEY.format(tag=f"genre:{genre.id}")
+
+    for page_number in range(3):
+        await engine.put_to_cache(
+            f"genres_list:{page_number}", [genre], 10, tags=[f"genre:{genre.id}"]
+        )
+        clock[0] += 20
+
+    await engine.put_to_cache("genres_list:3", [genre], 10, tags=[f"genre:{genre.id}"])
+
+    assert await redis.zrange(tag_key, 0, -1) == [b"genres_list:3"]
+
+
+async def test_invalidate_tags_deletes_live_keys(make_redis, clock):
+    redis = make_redis()
+    engine = RedisCacheEngine(redis)
+    genre = Genre(id=uuid4(), name="Action")
+    tags = [f"genre:{genre.id}"]
+
+    await engine.put_to_cache("genres_list:1", [genre], 10, tags=tags)
+    await engine.put_to_cache("genres_list:2", [genre], 100, tags=tags)
+    clock[0] += 50
+
+    assert await engine.invalidate_tags(tags) == ["genres_list:2"]
+    assert not await redis.exists("genres_list:2", TAG_KEY.format(tag=tags[0]))
+
+
+async def test_film_change_evicts_persons_of_search_pages(make_redis):
+    person_id, film_id = uuid4(), uuid4()
+    search = AsyncMock()
+    search.msearch.return_value = [
+        [{"id": str(film_id), "actors": [{"id": str(person_id)}]}]
+    ]
+    cache = BaseCache(RedisCacheEngine(make_redis()))
+    service = PersonService(cache, search)
+
+    await service._get_persons_with_films([{"id": person_id, "full_name": "Actor"}])
+    assert await cache.get_many_by_id("person", [person_id], Person) != [None]
+
+    await cache.cache_engine.invalidate_tags([f"film:{film_id}"])
+
+    assert await cache.get_many_by_id("person", [person_id], Person) == [None]
+
+
+async def test_normalized_page_items_carry_tags(make_redis):
+    cache = BaseCache(RedisCacheEngine(make_redis()), normalized=True)
+    genres = [Genre(id=uuid4(), name=f"Genre {i}") for i in range(2)]
+
+    async def load_page():
+        return genres
+
+    await cache.get_or_load_by_key(
+        "genres_list",
+        1,
+        Object=Genre,
+        loader=load_page,
+        expiration=60,
+        entity_name="genre",
+        tags=lambda genres: [f"genre:{genre.id}" for genre in genres],
+    )
+    await cache.cache_engine.invalidate_tags([f"genre:{genres[0].id}"])
+
+    items = await cache.get_many_by_id(
+        "genre_item", [genre.id for genre in genres], Genre
+    )
+    assert items[0] is None
+    assert items[1].id == genres[1].id
@@ -0,0 +1,79 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from services.events import CacheEventConsumer, _parse_xreadgroup
+
+pytestmark = pytest.mark.asyncio
+
+STREAM, GROUP = "cache:events", "movies_api"
+
+
+def make_consumer(redis, **kwargs):
+    service = Mock()
+    service.cache_engine.invalidate_by_id = AsyncMock()
+    service.cache_engine.invalidate_tags = AsyncMock()
+    return CacheEventConsumer(
+        redis, {"film": service}, STREAM, GROUP, block=10, rebuild=False, **kwargs
+    )
+
+
+async def test_trimmed_entries_are_parsed():
+    response = [[b"cache:events", [[b"1-0", None], [b"2-0", [b"entity", b"film"]]]]]
+
+    assert _parse_xreadgroup(response) == [
+        [b"cache:events", [(b"1-0", None), (b"2-0", {b"entity": b"film"})]]
+    ]
+
+
+async def test_trimmed_entries_are_skipped(make_redis):
+    consumer = make_consumer(make_redis())
+    film_id = uuid4()
+
+    await consumer._handle(
+        [
+            (b"1-0", None),
+            (b"2-0", {b"entity": b"film", b"id": str(film_id).encode()}),
+        ]
+    )
+
+    invalidate_by_id = consumer.services["film"].cache_engine.invalidate_by_id
+    invalidate_by_id.assert_awaited_once_with("film", film_id)
+
+
+async def test_events_are_handled_and_acknowledged(make_redis, monkeypatch):
+    redis = make_redis()
+    xreadgroup = redis.xreadgroup
+
+    async def blocking_xreadgroup(*args, **kwargs):
+        # fakeredis blocks without giving the event loop a turn.
+        await asyncio.sleep(0.001)
+        return await xreadgroup(*args, **kwargs)
+
+    monkeypatch.setattr(redis, "xreadgroup", blocking_xreadgroup)
+    consumer = make_consumer(redis)
+    film_id = uuid4()
+    await consumer._create_group()
+    await redis.xadd(STREAM, {"entity": "film", "id": str(film_id)})
+
+    consumer.start()
+    await asyncio.sleep(0.05)
+    await consumer.stop()
+
+    invalidate_tags = consumer.services["film"].cache_engine.invalidate_tags
+    invalidate_tags.assert_awaited_once_with(f"film:{film_id}")
+    assert (await redis.xpending(STREAM, GROUP))["pending"] == 0
+
+
+async def test_stale_consumers_are_removed(make_redis):
+    redis = make_redis()
+    consumer = make_consumer(redis, claim_idle=0)
+    await consumer._create_group()
+    await redis.xreadgroup(GROUP, "stopped-worker", {STREAM: ">"})
+    await redis.xreadgroup(GROUP, consumer.name, {STREAM: ">"})
+
+    await consumer._remove_stale_consumers()
+
+    consumers = await redis.xinfo_consumers(STREAM, GROUP)
+    assert [consumer["name"] for consumer in consumers] == [consumer.name.encode()]
@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+from core.config import settings
+from services import hotkeys
+from services.hotkeys import HotKeyTracker
+
+
+def make_tracker(redis, window=100):
+    tracker = HotKeyTracker(redis, sample_rate=1, top_k=2, threshold=5)
+    tracker._window = lambda: window
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_merge_sums_counts_of_all_workers(make_redis):
+    workers = [make_tracker(make_redis()) for _ in range(2)]
+    for worker, accesses in zip(workers, [{"a": 3, "b": 1}, {"a": 3, "c": 4}]):
+        for key, count in accesses.items():
+            for _ in range(count):
+                worker.record(key)
+
+    for worker in workers:
+        await worker.merge()
+
+    assert await workers[1].global_top() == [("a", 6.0), ("c", 4.0)]
+    assert workers[1].hot == ["a"]
+    # The local counts start over after a merge.
+    assert workers[1].local_top() == []
+
+
+@pytest.mark.asyncio
+async def test_global_top_spans_the_previous_window(make_redis):
+    redis = make_redis()
+    previous = make_tracker(redis, window=100)
+    for _ in range(4):
+        previous.record("a")
+    await previous.merge()
+
+    current = make_tracker(redis, window=101)
+    current.record("a")
+    await current.merge()
+
+    assert await current.global_top() == [("a", 5.0)]
+    assert current.hot == ["a"]
+
+
+def test_tracker_without_local_cache_warns(make_redis, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "hot_keys_enabled", True)
+    monkeypatch.setattr(settings, "local_cache_enabled", False)
+    hotkeys.get_hot_key_tracker.cache_clear()
+
+    with caplog.at_level(logging.WARNING):
+        assert hotkeys.get_hot_key_tracker(make_redis()) is not None
+
+    hotkeys.get_hot_key_tracker.cache_clear()
+    assert "not pinned" in caplog.text
@@ -0,0 +1,83 @@
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from services.cache import CACHE_KEY_PREFIX, LocalCacheEngine, TinyLfuCache
+
+
+def request(cache: TinyLfuCache, key: str) -> None:
+    cache.record(key)
+    if cache.get(key) is None:
+        cache.put(key, key)
+
+
+def test_window_and_main_split_the_size():
+    cache = TinyLfuCache(100, window_share=0.1)
+
+    assert (cache.window_size, cache.main_size, cache.protected_size) == (10, 90, 72)
+
+
+def test_sketch_is_halved_after_a_sample():
+    cache = TinyLfuCache(10)
+    for _ in range(cache._sample_size - 1):
+        cache.record("hot")
+    estimate = cache.sketch.estimate("hot")
+
+    cache.record("hot")
+
+    assert cache.sketch.estimate("hot") == (estimate + 1) // 2
+
+
+def test_scan_does_not_evict_frequent_keys():
+    cache = TinyLfuCache(100)
+    hot = [f"hot:{i}" for i in range(50)]
+    for _ in range(5):
+        for key in hot:
+            request(cache, key)
+
+    for i in range(1000):
+        request(cache, f"scan:{i}")
+
+    assert all(key in cache for key in hot)
+    assert len(cache) <= 100
+
+
+def test_frequent_newcomer_replaces_the_victim():
+    cache = TinyLfuCache(10, window_share=0.1)
+    for i in range(10):
+        request(cache, f"old:{i}")
+    for _ in range(5):
+        cache.record("new")
+
+    request(cache, "new")
+    request(cache, "next")
+
+    assert "new" in cache
+    assert len(cache) == 10
+
+
+@pytest.mark.asyncio
+async def test_namespaces_have_their_own_budgets():
+    cache = LocalCacheEngine(AsyncMock(), {"film": 10, "genre": 2}, 60)
+
+    for i in range(20):
+        await cache.put_to_cache(f"{CACHE_KEY_PREFIX}:film:{i}", i, 60)
+        await cache.put_to_cache(f"{CACHE_KEY_PREFIX}:genre:{i}", i, 60)
+    await cache.put_to_cache(f"{CACHE_KEY_PREFIX}:person:1", 1, 60)
+
+    assert len(cache._entries["film"]) == 10
+    assert len(cache._entries["genre"]) == 2
+    assert "person" not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_local_entries_expire(monkeypatch):
+    cache = LocalCacheEngine(AsyncMock(), {"film": 10}, 5)
+    key = f"{CACHE_KEY_PREFIX}:film:1"
+    await cache.put_to_cache(key, 1, 60)
+    assert cache._get_local(key, None) == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert cache._get_local(key, None) is None
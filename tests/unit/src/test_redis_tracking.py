@@ -0,0 +1,101 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from db.redis import RedisTrackingListener
+from fakeredis._core._database import Database
+from models.genre import Genre
+from services.cache import CACHE_KEY_PREFIX, LocalCacheEngine, RedisCacheEngine
+
+pytestmark = pytest.mark.asyncio
+
+PREFIXES = [f"{CACHE_KEY_PREFIX}:genre:"]
+
+
+class TrackingConnection:
+    """RESP3 connection of a fake Redis server with broadcast tracking."""
+
+    def __init__(self, server):
+        self.server = server
+        self.prefixes: list[str] = []
+        self.replies = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.connected = True
+
+    async def send_command(self, *args):
+        assert args[:4] == ("CLIENT", "TRACKING", "ON", "BCAST")
+        self.prefixes = list(args[5::2])
+        self.server.append(self)
+        self.replies.put_nowait(b"OK")
+
+    async def read_response(self, push_request=False):
+        return await self.replies.get()
+
+    def invalidate(self, key: str):
+        if any(key.startswith(prefix) for prefix in self.prefixes):
+            self.replies.put_nowait([b"invalidate", [key.encode()]])
+
+    async def disconnect(self):
+        self.connected = False
+        if self in self.server:
+            self.server.remove(self)
+
+
+@pytest.fixture
+def tracking_server(monkeypatch):
+    """Connections with tracking on, told of every key a client changes."""
+    connections = []
+    notify_watch = Database.notify_watch
+
+    def notify_and_invalidate(self, key):
+        notify_watch(self, key)
+        for connection in list(connections):
+            connection.loop.call_soon_threadsafe(connection.invalidate, key.decode())
+
+    monkeypatch.setattr(Database, "notify_watch", notify_and_invalidate)
+    return connections
+
+
+async def make_worker(make_redis, tracking_server):
+    redis = make_redis()
+    cache = LocalCacheEngine(RedisCacheEngine(redis), {"genre": 100}, 60)
+    listener = RedisTrackingListener(redis, cache.invalidate_local, PREFIXES)
+
+    async def new_connection():
+        return TrackingConnection(tracking_server)
+
+    listener._new_connection = new_connection
+    await listener.start()
+    return cache, listener
+
+
+async def test_write_evicts_local_copy_of_other_worker(make_redis, tracking_server):
+    (writer, writer_listener), (reader, reader_listener) = [
+        await make_worker(make_redis, tracking_server) for _ in range(2)
+    ]
+    genre_id = uuid4()
+    key = writer._generate_cache_key("genre", genre_id)
+
+    # The reader wrote the key itself, so it holds it locally.
+    await reader.put_to_cache(key, Genre(id=genre_id, name="Action"), 60)
+    await asyncio.sleep(0.01)
+    await writer.put_to_cache(key, Genre(id=genre_id, name="Drama"), 60)
+    await asyncio.sleep(0.01)
+
+    try:
+        genre = await reader.get_from_cache(key, Genre)
+        assert genre.name == "Drama"
+    finally:
+        await writer_listener.stop()
+        await reader_listener.stop()
+
+
+async def test_reconnect_closes_previous_connection(make_redis, tracking_server):
+    _, listener = await make_worker(make_redis, tracking_server)
+    connection = listener._connection
+
+    await listener._connect()
+
+    assert not connection.connected
+    assert tracking_server == [listener._connection]
+    await listener.stop()
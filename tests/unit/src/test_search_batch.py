@@ -0,0 +1,86 @@
+import asyncio
+import gc
+from unittest.mock import AsyncMock
+
+import pytest
+from services.search import BaseSearch
+
+pytestmark = pytest.mark.asyncio
+
+INDEX = "movies_test"
+
+
+def make_search(batch_window=0.01, batch_size=1000):
+    engine = AsyncMock()
+    engine.get_by_ids.side_effect = lambda index, ids, source: [
+        {"id": id, "source": source} for id in ids
+    ]
+    return BaseSearch(engine, batch_window=batch_window, batch_size=batch_size)
+
+
+async def test_callers_share_one_fetch_per_id():
+    search = make_search()
+
+    docs = await asyncio.gather(
+        *[search.get_by_id(INDEX, id) for id in ["a", "b", "a"]]
+    )
+
+    assert [doc["id"] for doc in docs] == ["a", "b", "a"]
+    search.search_engine.get_by_ids.assert_awaited_once_with(INDEX, ["a", "b"], None)
+
+
+async def test_batches_split_per_projection():
+    search = make_search()
+
+    docs = await asyncio.gather(
+        search.get_by_id(INDEX, "a", ["id"]), search.get_by_id(INDEX, "a")
+    )
+
+    assert [doc["source"] for doc in docs] == [["id"], None]
+    assert search.search_engine.get_by_ids.await_count == 2
+
+
+async def test_full_batch_is_fetched_before_the_window():
+    search = make_search(batch_window=10, batch_size=2)
+
+    docs = await asyncio.wait_for(
+        asyncio.gather(search.get_by_id(INDEX, "a"), search.get_by_id(INDEX, "b")),
+        timeout=1,
+    )
+
+    assert [doc["id"] for doc in docs] == ["a", "b"]
+
+
+async def test_cancelled_caller_does_not_fail_the_others():
+    search = make_search()
+    cancelled = asyncio.create_task(search.get_by_id(INDEX, "a"))
+    waiting = asyncio.create_task(search.get_by_id(INDEX, "a"))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+
+    assert (await waiting)["id"] == "a"
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+
+async def test_failed_fetch_without_callers_is_not_reported():
+    search = make_search()
+
+    def fail(index, ids, source):
+        raise RuntimeError("Search failed")
+
+    search.search_engine.get_by_ids.side_effect = fail
+    reported = []
+    asyncio.get_running_loop().set_exception_handler(
+        lambda loop, context: reported.append(context)
+    )
+
+    caller = asyncio.create_task(search.get_by_id(INDEX, "a"))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await asyncio.sleep(0.05)
+    del caller
+    gc.collect()
+
+    assert not reported
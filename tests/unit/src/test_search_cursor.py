@@ -0,0 +1,68 @@
+import base64
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import BadRequestError
+from services.search import (
+    BaseSearch,
+    ElasticAsyncSearchEngine,
+    SearchPage,
+    decode_cursor,
+    encode_cursor,
+)
+
+pytestmark = pytest.mark.asyncio
+
+INDEX = "movies_test"
+SORT = [{"imdb_rating": {"order": "asc"}}, {"id": "asc"}]
+DESC_SORT = [{"imdb_rating": {"order": "desc"}}, {"id": "asc"}]
+
+
+def tamper(cursor: str, **changes) -> str:
+    data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    data.update(changes)
+    return base64.urlsafe_b64encode(orjson.dumps(data)).decode().rstrip("=")
+
+
+async def test_cursor_round_trip():
+    cursor = encode_cursor(SearchPage([], [7.5, "id-1"]), INDEX, SORT)
+
+    assert decode_cursor(cursor, INDEX, SORT) == ([7.5, "id-1"], None)
+    assert decode_cursor("", INDEX, SORT) == (None, None)
+
+
+@pytest.mark.parametrize(
+    "index, sort, changes",
+    [
+        (INDEX, DESC_SORT, {}),
+        ("genres_test", SORT, {}),
+        (INDEX, SORT, {"after": [7.5]}),
+        (INDEX, SORT, {"after": "7.5"}),
+        (INDEX, SORT, {"after": [{"script": "1"}, "id-1"]}),
+        (INDEX, SORT, {"pit": ["pit-id"]}),
+    ],
+)
+async def test_tampered_cursor_is_rejected(index, sort, changes):
+    cursor = tamper(
+        encode_cursor(SearchPage([], [7.5, "id-1"]), INDEX, SORT), **changes
+    )
+    search = BaseSearch(AsyncMock())
+
+    with pytest.raises(ValueError):
+        await search.search_page(index, {"match_all": {}}, 10, sort, cursor)
+    search.search_engine.search_page.assert_not_called()
+
+
+async def test_rejected_sort_values_are_a_value_error():
+    elastic = AsyncMock()
+    elastic.search.side_effect = BadRequestError(
+        "search_phase_execution_exception",
+        ApiResponseMeta(400, "1.1", HttpHeaders(), 0.0, NodeConfig("http", "es", 9200)),
+        {},
+    )
+    engine = ElasticAsyncSearchEngine(elastic)
+
+    with pytest.raises(ValueError):
+        await engine.search_page(INDEX, {"match_all": {}}, 10, SORT, ["text", "id-1"])